@@ -0,0 +1,110 @@
+import asyncio
+import json
+from collections import Counter
+from typing import Any, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+
+class StandInBackend:
+    """
+    Local stand-in for the Pipe Network API, the geo lookup service and the nodes.
+
+    Accounts use it as their HTTP proxy: plain requests arrive in absolute form and are
+    answered directly, ``CONNECT`` tunnels (latency probes) are accepted and then served
+    on the same connection, so the real curl_cffi sessions and probes run end to end
+    without leaving the machine.
+    """
+
+    API_URL = "http://api.standin/api"
+    EXTENSION_API_URL = "http://extension.standin/api"
+    GEO_LOCATION_URL = "http://geo.standin/json/"
+    NODE_IP = "127.0.0.1"
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.requests: Counter[str] = Counter()
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+
+    @property
+    def proxy_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def wait_idle(self, timeout: float = 5.0) -> None:
+        """Waits until the clients have closed their connections, at most ``timeout`` seconds"""
+        deadline = asyncio.get_running_loop().time() + timeout
+        while self._connections and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.05)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+
+    def route(self, method: str, path: str) -> Tuple[int, Any]:
+        if path.endswith("/login"):
+            return 200, {"token": "stand-in-token"}
+        if path.endswith("/nodes"):
+            return 200, [{"node_id": 1, "ip": self.NODE_IP}]
+        if path.endswith("/test"):
+            return 200, {"message": "Test result saved", "points": 1}
+        if path.endswith("/heartbeat"):
+            return 200, {"message": "Heartbeat recorded successfully."}
+        if path.endswith("/points"):
+            return 200, {"points": 100}
+        if path == "/json/":
+            return 200, {"ip": "127.0.0.1", "city": "Local", "region": "Local", "country_name": "Local"}
+        if method == "HEAD":
+            return 200, None
+
+        return 404, {"error": f"unknown endpoint {path}"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        try:
+            while True:
+                head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+                request_line, *header_lines = head.rstrip("\r\n").split("\r\n")
+                method, target, _ = request_line.split(" ", 2)
+
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                content_length = int(headers.get("content-length", 0))
+                if content_length:
+                    await reader.readexactly(content_length)
+
+                if method == "CONNECT":
+                    writer.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+                    await writer.drain()
+                    continue
+
+                path = urlparse(target).path or "/"
+                self.requests[path] += 1
+                status, payload = self.route(method, path)
+
+                body = b"" if payload is None else json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Not Found'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode()
+                )
+                if method != "HEAD":
+                    writer.write(body)
+                await writer.drain()
+
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
@@ -0,0 +1,163 @@
+"""
+Connections opened and request latency for accounts sharing one egress path.
+
+Every simulated account opens a session per pass and sends a few API requests, like a
+farming pass, against a local TLS server that counts accepted connections. The same
+workload runs with per-account sessions and with connection sharing:
+
+    python -m benchmarks.connections --accounts 200 --passes 3 --concurrency 50
+
+The local server speaks HTTP/1.1 only (the standard library has no HTTP/2 server), so
+concurrent requests get a connection each and the numbers show connection reuse across
+accounts and passes, not stream multiplexing; with the HTTP/2 API endpoints the
+concurrent requests share the connection as well. Needs ``openssl`` on PATH for the
+throwaway certificate.
+"""
+
+import argparse
+import asyncio
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import ConnectionPool
+
+
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 15\r\n\r\n{\"status\":true}"
+
+
+class CountingServer:
+    """Minimal keep-alive HTTPS server that counts the connections it accepts"""
+
+    def __init__(self, ssl_context: ssl.SSLContext, latency: float):
+        self.ssl_context = ssl_context
+        self.latency = latency
+        self.connections = 0
+        self.server = None
+        self._handlers = set()
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0, ssl=self.ssl_context)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._handlers.add(asyncio.current_task())
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        await reader.readexactly(int(line.split(b":")[1]))
+
+                await asyncio.sleep(self.latency)
+                writer.write(RESPONSE)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def stop(self) -> None:
+        self.server.close()
+        # Keep-alive connections are still open, their handlers are waiting for the next request
+        for handler in self._handlers:
+            handler.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+
+def make_ssl_context(workdir: Path) -> ssl.SSLContext:
+    cert, key = workdir / "cert.pem", workdir / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=127.0.0.1",
+         "-keyout", str(key), "-out", str(cert)],
+        check=True, capture_output=True,
+    )
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+async def run_variant(shared: bool, args: argparse.Namespace, ssl_context: ssl.SSLContext) -> Dict[str, float]:
+    server = CountingServer(ssl_context, args.latency)
+    port = await server.start()
+    url = f"https://127.0.0.1:{port}/api"
+    pool = ConnectionPool(enabled=shared, idle_timeout=60)
+    limiter = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+
+    async def account_pass(index: int) -> None:
+        async with limiter:
+            session = pool.session(impersonate="chrome124", verify=False, timeout=30)
+            session.headers = {"authorization": f"Bearer token-{index}"}
+            try:
+                for _ in range(args.requests):
+                    started = time.perf_counter()
+                    await session.post(f"{url}/ping", json={"account": index})
+                    latencies.append(time.perf_counter() - started)
+            finally:
+                await session.close()
+
+    started = time.perf_counter()
+    for _ in range(args.passes):
+        await asyncio.gather(*(account_pass(index) for index in range(args.accounts)))
+    elapsed = time.perf_counter() - started
+
+    await pool.close()
+    await server.stop()
+
+    latencies.sort()
+    return {
+        "connections": server.connections,
+        "requests": len(latencies),
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "elapsed": elapsed,
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory(prefix="connections-") as directory:
+        ssl_context = make_ssl_context(Path(directory))
+        results = {}
+        for name, shared in (("per-account", False), ("shared", True)):
+            results[name] = result = await run_variant(shared, args, ssl_context)
+            print(
+                f"{name:<12} | connections {result['connections']:>6} | requests {result['requests']:>6} | "
+                f"p50 {result['p50']:7.2f} ms | p99 {result['p99']:7.2f} ms | {result['elapsed']:6.2f}s"
+            )
+
+    before, after = results["per-account"], results["shared"]
+    print(
+        f"\nshared vs per-account: {before['connections'] / max(after['connections'], 1):.1f}x fewer connections, "
+        f"p50 {after['p50'] - before['p50']:+.2f} ms"
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare connection counts with and without connection sharing")
+    parser.add_argument("--accounts", type=int, default=200, help="Accounts behind the same egress path")
+    parser.add_argument("--passes", type=int, default=3, help="Farming passes per account")
+    parser.add_argument("--requests", type=int, default=4, help="Requests per pass")
+    parser.add_argument("--concurrency", type=int, default=50, help="Accounts running a pass at the same time")
+    parser.add_argument("--latency", type=float, default=0.005, help="Server response delay in seconds")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    logger.remove()
+    asyncio.run(run_benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Memory regression benchmark for farming passes.
+
+Runs repeated full farming passes (real Bot, scheduler and curl_cffi sessions) against the
+local stand-in backend and compares ``tracemalloc`` snapshots taken after each pass. After
+the warm-up passes any retained growth is a leak candidate; the run fails when the median
+growth per pass per 1000 accounts exceeds the budget.
+
+    python -m benchmarks.memory --accounts 500 --passes 10 --budget-kb 64
+"""
+
+import argparse
+import asyncio
+import gc
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from functools import partial
+from pathlib import Path
+from typing import List
+
+from better_proxy import Proxy
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from loader import config, semaphore, pacer
+from core.bot import Bot
+from core.scheduler import FarmScheduler
+from models import Account
+from utils import metrics
+from utils.metrics import Histogram
+
+from benchmarks.backend import StandInBackend
+from benchmarks.simulate import MemoryAccountsStore
+
+
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+    # The stand-in backend runs in this process, its buffers aren't client memory
+    tracemalloc.Filter(False, "*/benchmarks/backend.py"),
+)
+
+
+def stand_in_bot(backend: StandInBackend, store: MemoryAccountsStore) -> type[Bot]:
+    class StandInBot(Bot):
+        SITE_API_URL = backend.API_URL
+        EXTENSION_API_URL = backend.EXTENSION_API_URL
+        GEO_LOCATION_URL = backend.GEO_LOCATION_URL
+        accounts_store = store
+
+    return StandInBot
+
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+
+def traced_size(snapshot: tracemalloc.Snapshot) -> int:
+    return sum(stat.size for stat in snapshot.statistics("filename"))
+
+
+def format_size(size: float) -> str:
+    return f"{size / 1024:+.1f} KiB"
+
+
+async def run_passes(args: argparse.Namespace) -> int:
+    backend = StandInBackend()
+    await backend.start()
+
+    store = MemoryAccountsStore()
+    scheduler = FarmScheduler(bot_class=stand_in_bot(backend, store))
+    proxy = Proxy.from_str(backend.proxy_url)
+    accounts = [Account(email=f"bench{index}@example.com", password="password", proxy=proxy) for index in range(args.accounts)]
+
+    config.delay_before_start.min = config.delay_before_start.max = 0
+
+    # Ring buffers are bounded by design; shrink them so they fill up during the warm-up
+    # and their steady state isn't reported as growth
+    metrics.histograms = defaultdict(partial(Histogram, max_samples=64))
+    pacer.report_interval = 1
+    semaphore.adaptive = False
+    await semaphore.set_limit(args.threads)
+
+    sizes: List[int] = []
+    baseline = snapshot = None
+    try:
+        for number in range(1, args.warmup + args.passes + 1):
+            started = time.perf_counter()
+            await scheduler.run(accounts, passes=1)
+
+            # Make every account due again for the next pass
+            for account in store.accounts.values():
+                account.sleep_until = account.next_heartbeat_in = None
+
+            # Connections still being torn down would be counted as growth
+            await backend.wait_idle()
+            snapshot = take_snapshot()
+            sizes.append(traced_size(snapshot))
+            print(
+                f"Pass {number:>3}{' (warm-up)' if number <= args.warmup else '':<10} | "
+                f"{time.perf_counter() - started:6.2f}s | traced {sizes[-1] / 1024 / 1024:7.2f} MiB"
+            )
+
+            if number == args.warmup:
+                baseline = snapshot
+    finally:
+        await backend.stop()
+
+    # Median step between consecutive snapshots: a leak grows every pass, a one-off
+    # allocation (a cache filling up, a late connection) only moves one step
+    steps = [after - before for before, after in zip(sizes[args.warmup - 1:], sizes[args.warmup:])]
+    per_pass = statistics.median(steps)
+    growth = per_pass * args.passes
+    per_pass_per_1k = per_pass / (args.accounts / 1000)
+
+    print(f"\nRequests served: {sum(backend.requests.values())}")
+    print(f"Max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+    print(f"Growth after warm-up: {format_size(per_pass)} per pass (median), {format_size(growth)} over {args.passes} passes, "
+          f"{format_size(per_pass_per_1k)} per pass per 1k accounts (budget {args.budget_kb:.0f} KiB)")
+
+    print(f"\nTop {args.top} growing lines:")
+    # compare_to sorts by absolute difference, shrinking lines are mixed in
+    growing = [stat for stat in snapshot.compare_to(baseline, "lineno") if stat.size_diff > 0]
+    for stat in growing[:args.top]:
+        frame = stat.traceback[0]
+        print(f"  {format_size(stat.size_diff):>14} {stat.count_diff:+7d} blocks  {frame.filename}:{frame.lineno}")
+
+    if per_pass_per_1k > args.budget_kb * 1024:
+        print("\nFAILED: memory growth exceeds the budget")
+        return 1
+
+    print("\nOK")
+    return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure memory growth across farming passes")
+    parser.add_argument("--accounts", type=int, default=500, help="Number of accounts per pass")
+    parser.add_argument("--passes", type=int, default=10, help="Measured passes after the warm-up")
+    parser.add_argument("--warmup", type=int, default=2, help="Passes run before the baseline snapshot")
+    parser.add_argument("--threads", type=int, default=50, help="Concurrency limit for passes")
+    parser.add_argument("--budget-kb", type=float, default=64, help="Allowed growth per pass per 1k accounts (KiB)")
+    parser.add_argument("--top", type=int, default=10, help="Number of source lines to show")
+    args = parser.parse_args()
+    args.warmup = max(args.warmup, 1)
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+
+    # Keep loguru formatting every message as it does in production, without the console output
+    logger.remove()
+    logger.add(lambda message: None, level="DEBUG")
+
+    tracemalloc.start()
+    exit_code = asyncio.run(run_passes(args))
+    tracemalloc.stop()
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Fleet simulation under virtual time.
+
+Runs the real FarmScheduler/Bot code against an in-memory account store and a fake API
+on an event loop whose timers jump straight to the next deadline, so hours of farming
+take seconds to minutes of real time. Reports requests per hour, keepalive/heartbeat
+punctuality and the real CPU cost of scheduling.
+
+Run from the project root (the regular config is loaded for intervals and deadlines):
+
+    python -m benchmarks.simulate --accounts 100000 --hours 24 --threads 1000
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import pytz
+from better_proxy import Proxy
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from loader import config, semaphore, pacer
+from core.bot import Bot
+from core.scheduler import FarmScheduler
+from models import Account
+from utils import clock, metrics, VirtualClock, VirtualTimeEventLoop
+
+
+class SimulatedAccount:
+    def __init__(self, email: str):
+        self.email = email
+        self.token: Optional[str] = None
+        self.token_expires_at: Optional[datetime] = None
+        self.headers_version = 0
+        self.sleep_until: Optional[datetime] = None
+        self.next_heartbeat_in: Optional[datetime] = None
+        self.failure_count = 0
+        self.quarantined_until: Optional[datetime] = None
+        self.disabled = False
+        self.last_error: Optional[str] = None
+
+
+class MemoryAccountsStore:
+    """Implements the part of ``database.Accounts`` used by Bot, without a database"""
+
+    def __init__(self):
+        self.accounts: Dict[str, SimulatedAccount] = {}
+
+    async def get_state(self, email: str) -> Optional[SimulatedAccount]:
+        return self.accounts.get(email)
+
+    async def create_account(
+            self, email: str, token: str = None, token_expires_at: datetime = None, headers_version: int = 0
+    ) -> bool:
+        created = email not in self.accounts
+        account = self.accounts.setdefault(email, SimulatedAccount(email))
+        account.token = token
+        account.token_expires_at = token_expires_at
+        account.headers_version = headers_version
+        return created
+
+    async def set_sleep_until(self, email: str, sleep_until: datetime) -> bool:
+        self.accounts[email].sleep_until = sleep_until
+        return True
+
+    async def set_next_heartbeat_in(self, email: str, next_heartbeat_in: datetime) -> bool:
+        self.accounts[email].next_heartbeat_in = next_heartbeat_in
+        return True
+
+    async def register_failure(
+            self, email: str, error: str, retryable: bool, backoff_base: float, backoff_max: float
+    ) -> SimulatedAccount:
+        account = self.accounts.setdefault(email, SimulatedAccount(email))
+        account.failure_count += 1
+        account.last_error = error[:500]
+
+        if retryable:
+            delay = min(backoff_base * 2 ** (account.failure_count - 1), backoff_max)
+            account.quarantined_until = clock.now() + timedelta(seconds=delay)
+        else:
+            account.disabled = True
+
+        return account
+
+
+class SimulatedResponse:
+    def __init__(self, data, status_code: int = 200):
+        self.data = data
+        self.status_code = status_code
+        self.text = str(data)
+
+    def json(self):
+        return self.data
+
+
+class Simulation:
+    def __init__(self, latency: float, error_rate: float):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.store = MemoryAccountsStore()
+        self.requests: Counter[str] = Counter()
+        self.keepalive_lateness: List[float] = []
+        self.heartbeat_lateness: List[float] = []
+
+    async def respond(self, email: str, url: str) -> SimulatedResponse:
+        path = urlparse(url).path
+        self.requests[path] += 1
+        await asyncio.sleep(random.lognormvariate(0, 0.5) * self.latency)
+
+        if random.random() < self.error_rate:
+            return SimulatedResponse("Service Unavailable", status_code=503)
+
+        account = self.store.accounts.get(email)
+        if path.endswith("/login"):
+            return SimulatedResponse({"token": f"token-{email}"})
+        if path.endswith("/nodes"):
+            return SimulatedResponse([{"node_id": 1, "ip": "10.0.0.1"}])
+        if path.endswith("/test"):
+            self._lateness(self.keepalive_lateness, account and account.sleep_until)
+            return SimulatedResponse({"message": "Test result saved", "points": 1})
+        if path.endswith("/heartbeat"):
+            self._lateness(self.heartbeat_lateness, account and account.next_heartbeat_in)
+            return SimulatedResponse({"message": "Heartbeat recorded successfully."})
+        if path.endswith("/points"):
+            return SimulatedResponse({"points": 100})
+        if path == "/json/":
+            return SimulatedResponse({"ip": "10.0.0.2", "city": "Sim", "region": "Sim", "country_name": "Sim"})
+
+        return SimulatedResponse({"error": f"unknown endpoint {path}"}, status_code=404)
+
+    @staticmethod
+    def _lateness(samples: List[float], due: Optional[datetime]) -> None:
+        if due is not None:
+            samples.append((clock.now() - due.replace(tzinfo=pytz.UTC)).total_seconds())
+
+
+class SimulatedSession:
+    def __init__(self, simulation: Simulation, email: str):
+        self.simulation = simulation
+        self.email = email
+        self.headers: dict = {"user-agent": "simulation"}
+        self.proxies: dict = {}
+
+    async def post(self, url: str, **kwargs) -> SimulatedResponse:
+        return await self.simulation.respond(self.email, url)
+
+    async def get(self, url: str, **kwargs) -> SimulatedResponse:
+        return await self.simulation.respond(self.email, url)
+
+    async def options(self, url: str, **kwargs) -> SimulatedResponse:
+        return await self.simulation.respond(self.email, url)
+
+    async def close(self) -> None:
+        pass
+
+
+def simulated_bot(simulation: Simulation) -> type[Bot]:
+    class SimulatedBot(Bot):
+        accounts_store = simulation.store
+
+        def setup_session(self) -> SimulatedSession:
+            return SimulatedSession(simulation, self.account_data.email)
+
+        async def clear_request(self, url: str, headers: dict = None, cookies: dict = None) -> SimulatedResponse:
+            return await self.session.get(url)
+
+        async def test_node_latency(self, ip: str) -> int:
+            await asyncio.sleep(simulation.latency)
+            return int(simulation.latency * 1000)
+
+    return SimulatedBot
+
+
+def percentiles(samples: List[float]) -> str:
+    if not samples:
+        return "n/a"
+
+    ordered = sorted(samples)
+    last_index = len(ordered) - 1
+    values = {q: ordered[int(q * last_index)] for q in (0.5, 0.9, 0.99)}
+    return f"p50 {values[0.5]:.1f}s, p90 {values[0.9]:.1f}s, p99 {values[0.99]:.1f}s, max {ordered[-1]:.1f}s"
+
+
+async def simulate(args: argparse.Namespace) -> Simulation:
+    simulation = Simulation(latency=args.latency, error_rate=args.error_rate)
+    scheduler = FarmScheduler(bot_class=simulated_bot(simulation))
+
+    semaphore.adaptive = False
+    await semaphore.set_limit(args.threads)
+
+    proxies = [Proxy.from_str(f"http://10.{index // 250}.{index % 250}.1:8080") for index in range(args.proxies)]
+    accounts = [
+        Account(email=f"sim{index}@example.com", password="password", proxy=proxies[index % len(proxies)])
+        for index in range(args.accounts)
+    ]
+    farm_task = asyncio.create_task(scheduler.run(accounts))
+    pacing_task = asyncio.create_task(pacer.report_periodically())
+
+    await asyncio.sleep(args.hours * 3600)
+
+    for task in [farm_task, pacing_task, *scheduler._tasks.values()]:
+        task.cancel()
+    await asyncio.gather(farm_task, pacing_task, return_exceptions=True)
+    return simulation
+
+
+def report(simulation: Simulation, args: argparse.Namespace, wall: float, cpu: float) -> None:
+    total_requests = sum(simulation.requests.values())
+    passes = metrics.histograms["scheduler.pass_ms"].count
+
+    print(f"Simulated {args.accounts} accounts for {args.hours}h "
+          f"(keepalive {config.keepalive_interval}s, heartbeat {config.heartbeat_interval}h, threads {args.threads})")
+    print(f"Requests: {total_requests} total, {total_requests / args.hours:.0f}/hour")
+    for path, count in simulation.requests.most_common():
+        print(f"  {path}: {count / args.hours:.0f}/hour")
+
+    print(f"Passes: {passes}, timed out: {metrics.counters.get('scheduler.pass_timeouts', 0)}")
+    print(f"Keepalive lateness: {percentiles(simulation.keepalive_lateness)}")
+    print(f"Heartbeat lateness: {percentiles(simulation.heartbeat_lateness)}")
+    print(f"Real time: {wall:.1f}s wall, {cpu:.1f}s CPU, {cpu / max(passes, 1) * 1e6:.0f}us CPU per pass")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Simulate farming under virtual time")
+    parser.add_argument("--accounts", type=int, default=10000, help="Number of simulated accounts")
+    parser.add_argument("--hours", type=float, default=24, help="Simulated duration in hours")
+    parser.add_argument("--threads", type=int, default=1000, help="Concurrency limit for passes")
+    parser.add_argument("--proxies", type=int, default=100, help="Number of simulated proxies shared by the accounts")
+    parser.add_argument("--latency", type=float, default=0.3, help="Median simulated API latency (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    random.seed(args.seed)
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    virtual_clock = VirtualClock()
+    clock.use(virtual_clock)
+    loop = VirtualTimeEventLoop(virtual_clock)
+    asyncio.set_event_loop(loop)
+
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    try:
+        simulation = loop.run_until_complete(simulate(args))
+    finally:
+        loop.close()
+
+    report(simulation, args, time.perf_counter() - wall_started, time.process_time() - cpu_started)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Write throughput of the accounts database under concurrent farming load.
+
+Every worker coroutine walks its share of the accounts and stores the next keepalive and
+heartbeat times, like the end of a farming pass. The same workload runs against fresh
+SQLite files with the old engine settings (Tortoise defaults, direct writes) and with
+the tuned pragmas and the single-writer queue, alone and combined:
+
+    python -m benchmarks.writes --accounts 5000 --concurrency 500
+
+``--external-writer`` adds a second process-like connection that keeps taking the write
+lock (as another tool, a migration or a second bot would), which is what turns into
+"database is locked" errors without a busy timeout.
+"""
+
+import argparse
+import asyncio
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytz
+from loguru import logger
+from tortoise import Tortoise
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import Accounts, build_tortoise_config, close_database, write_queue
+from database.migrations import apply_migrations
+from models import Config
+
+
+VARIANTS: Dict[str, Dict[str, Any]] = {
+    # Tortoise opens SQLite in WAL mode but keeps synchronous=FULL and no busy timeout
+    "before": {"pragmas": {}, "queue": False},
+    "pragmas": {"pragmas": Config.Database.SQLite().model_dump(), "queue": False},
+    "queue": {"pragmas": {}, "queue": True},
+    "after": {"pragmas": Config.Database.SQLite().model_dump(), "queue": True},
+}
+
+
+class ExternalWriter(threading.Thread):
+    """Repeatedly holds the SQLite write lock from another connection"""
+
+    def __init__(self, path: Path, hold: float = 0.02, pause: float = 0.05):
+        super().__init__(daemon=True)
+        self.path = path
+        self.hold = hold
+        self.pause = pause
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        while not self.stopped.is_set():
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("UPDATE pipe_network_accounts SET failure_count = failure_count WHERE id = 1")
+            time.sleep(self.hold)
+            connection.execute("COMMIT")
+            time.sleep(self.pause)
+        connection.close()
+
+
+async def run_variant(name: str, args: argparse.Namespace, workdir: Path) -> Dict[str, float]:
+    variant = VARIANTS[name]
+    path = workdir / f"{name}.sqlite3"
+    await Tortoise.init(config=build_tortoise_config(f"sqlite://{path}", sqlite_pragmas=variant["pragmas"]))
+    write_queue.configure(enabled=variant["queue"], batch_size=args.batch_size)
+
+    external = None
+    try:
+        await Tortoise.generate_schemas(safe=True)
+        await apply_migrations()
+
+        emails = [f"bench{index}@example.com" for index in range(args.accounts)]
+        await Accounts.bulk_create([Accounts(email=email) for email in emails], batch_size=1000)
+
+        if args.external_writer:
+            external = ExternalWriter(path)
+            external.start()
+
+        now = datetime.now(pytz.UTC)
+        errors: List[str] = []
+
+        async def worker(shard: List[str]) -> None:
+            for email in shard:
+                try:
+                    await Accounts.set_sleep_until(email, now + timedelta(minutes=2))
+                    await Accounts.set_next_heartbeat_in(email, now + timedelta(hours=24))
+                except Exception as error:
+                    errors.append(str(error))
+
+        shards = [emails[index::args.concurrency] for index in range(args.concurrency)]
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(shard) for shard in shards))
+        elapsed = time.perf_counter() - started
+    finally:
+        if external is not None:
+            external.stopped.set()
+            external.join()
+        await close_database()
+
+    writes = args.accounts * 2 - len(errors)
+    return {"writes_per_sec": writes / elapsed, "elapsed": elapsed, "errors": len(errors), "size": path.stat().st_size}
+
+
+async def run_benchmark(args: argparse.Namespace) -> None:
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory(prefix="writes-") as directory:
+        for name in args.variants:
+            results[name] = await run_variant(name, args, Path(directory))
+            result = results[name]
+            print(
+                f"{name:<8} | {result['writes_per_sec']:>10,.0f} writes/s | {result['elapsed']:7.2f}s | "
+                f"errors {result['errors']:>6} | db {result['size'] / 1024 / 1024:6.1f} MiB"
+            )
+
+    if "before" in results and "after" in results:
+        speedup = results["after"]["writes_per_sec"] / results["before"]["writes_per_sec"]
+        print(f"\nafter vs before: {speedup:.1f}x write throughput")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare accounts DB write throughput across SQLite settings")
+    parser.add_argument("--accounts", type=int, default=5000, help="Accounts to update (two writes each)")
+    parser.add_argument("--concurrency", type=int, default=500, help="Concurrent writer coroutines")
+    parser.add_argument("--batch-size", type=int, default=500, help="Write queue batch size")
+    parser.add_argument("--external-writer", action="store_true", help="Contend with a second connection holding the write lock")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS), help="Settings to compare")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    logger.remove()
+    asyncio.run(run_benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,2 @@
 from .main import Console
+from .dashboard import FleetDashboard
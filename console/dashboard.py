@@ -0,0 +1,139 @@
+import asyncio
+from collections import deque
+from typing import Dict, Tuple
+
+from rich import box
+from rich.console import Console as RichConsole, Group
+from rich.live import Live
+from rich.panel import Panel
+from rich.table import Table
+from rich.text import Text
+
+from utils import MetricsRegistry, clock, console_handler_options, set_console_handler
+from core.scheduler import FarmScheduler
+
+
+class FleetDashboard:
+    """
+    Live terminal view of the farm, redrawn every ``refresh_interval`` seconds.
+
+    Everything is read from the scheduler and the metrics registry, nothing is parsed
+    from logs. Request and error rates are computed over the last ``rate_window``
+    seconds from counter snapshots. While the dashboard runs, console logging is
+    limited to ``log_level`` so per-account lines don't scroll it away.
+    """
+
+    REQUESTS_PREFIX = "http.requests."
+
+    def __init__(
+            self,
+            scheduler: FarmScheduler,
+            metrics: MetricsRegistry,
+            refresh_interval: float = 1.0,
+            rate_window: float = 10.0,
+            log_level: str = "WARNING",
+    ):
+        self.scheduler = scheduler
+        self.metrics = metrics
+        self.refresh_interval = refresh_interval
+        self.rate_window = rate_window
+        self.log_level = log_level
+        self.console = RichConsole()
+        self._snapshots: deque[Tuple[float, Dict[str, float]]] = deque()
+        self._started_at = clock.time()
+        self._points_at_start = metrics.counters.get("points.earned", 0.0)
+
+    def _rates(self) -> Tuple[float, Dict[str, float]]:
+        """Counter deltas since the oldest snapshot inside the rate window, and the window length"""
+        now = clock.time()
+        self._snapshots.append((now, dict(self.metrics.counters)))
+        while len(self._snapshots) > 2 and now - self._snapshots[1][0] >= self.rate_window:
+            self._snapshots.popleft()
+
+        started, counters = self._snapshots[0]
+        current = self._snapshots[-1][1]
+        return now - started, {name: value - counters.get(name, 0.0) for name, value in current.items()}
+
+    def _accounts_table(self) -> Table:
+        now = clock.time()
+        in_flight = len(self.scheduler.in_flight)
+        sleeping = sum(
+            1 for email, next_run in self.scheduler.next_run.items()
+            if next_run > now and email in self.scheduler.accounts and email not in self.scheduler.in_flight
+        )
+        due = max(len(self.scheduler.accounts) - in_flight - sleeping, 0)
+
+        gauges = self.metrics.gauges
+        lag = self.metrics.histograms.get("loop.lag_ms")
+        points = self.metrics.counters.get("points.earned", 0.0) - self._points_at_start
+
+        table = Table(box=box.SIMPLE, show_header=False, expand=True)
+        table.add_column(style="cyan")
+        table.add_column(justify="right", style="magenta")
+        table.add_row("Accounts", str(len(self.scheduler.accounts)))
+        table.add_row("Due", str(due))
+        table.add_row("In flight", str(in_flight))
+        table.add_row("Sleeping", str(sleeping))
+        table.add_row("Threads", f"{gauges.get('concurrency.active', 0):.0f}/{gauges.get('concurrency.limit', 0):.0f}")
+        table.add_row("Proxies unhealthy", f"{gauges.get('proxy.unhealthy', 0):.0f}/{gauges.get('proxy.tracked', 0):.0f}")
+        table.add_row("Loop lag p99", f"{lag.percentiles((0.99,))['p99']:.0f} ms" if lag else "-")
+        table.add_row("Points this session", f"{points:,.0f}")
+        return table
+
+    def _endpoints_table(self) -> Table:
+        window, deltas = self._rates()
+
+        table = Table(box=box.SIMPLE, expand=True, header_style="bold cyan")
+        table.add_column("Endpoint")
+        table.add_column("req/s", justify="right")
+        table.add_column("errors", justify="right")
+        table.add_column("p50 ms", justify="right")
+        table.add_column("p99 ms", justify="right")
+        table.add_column("total", justify="right")
+
+        endpoints = sorted(name[len(self.REQUESTS_PREFIX):] for name in self.metrics.counters if name.startswith(self.REQUESTS_PREFIX))
+        for endpoint in endpoints:
+            requests = deltas.get(f"http.requests.{endpoint}", 0.0)
+            errors = deltas.get(f"http.errors.{endpoint}", 0.0)
+            error_rate = errors / requests if requests else 0.0
+            latency = self.metrics.histograms.get(f"http.latency_ms.{endpoint}")
+            percentiles = latency.percentiles((0.5, 0.99)) if latency else {"p50": 0.0, "p99": 0.0}
+
+            table.add_row(
+                endpoint,
+                f"{requests / window:.2f}" if window > 0 else "-",
+                Text(f"{error_rate:.1%}", style="red" if error_rate >= 0.1 else ""),
+                f"{percentiles['p50']:.0f}",
+                f"{percentiles['p99']:.0f}",
+                f"{self.metrics.counters[f'http.requests.{endpoint}']:,.0f}",
+            )
+
+        return table
+
+    def render(self) -> Panel:
+        uptime = int(clock.time() - self._started_at)
+        return Panel(
+            Group(self._accounts_table(), self._endpoints_table()),
+            title="Pipe Network Farm",
+            subtitle=f"uptime {uptime // 3600}h {uptime % 3600 // 60:02d}m {uptime % 60:02d}s",
+            border_style="green",
+            box=box.ASCII,
+        )
+
+    async def run(self) -> None:
+        # Refreshed manually at a fixed rate, so rich doesn't start its own refresh thread
+        with Live(self.render(), console=self.console, auto_refresh=False, redirect_stderr=True) as live:
+            # Log lines are printed above the panel by rich instead of being written over it
+            previous = console_handler_options()
+            set_console_handler(**{
+                **previous,
+                "sink": lambda message: live.console.print(Text.from_ansi(str(message).rstrip("\n"))),
+                "level": self.log_level,
+                "colorize": True,
+            })
+            try:
+                while True:
+                    await asyncio.sleep(self.refresh_interval)
+                    live.update(self.render(), refresh=True)
+            finally:
+                set_console_handler(**previous)
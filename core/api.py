@@ -3,15 +3,33 @@ import json
 import time
 
 from typing import Literal, Any
-from curl_cffi.requests import AsyncSession, Response, RequestsError
+from urllib.parse import urlparse
+from curl_cffi.requests import AsyncSession, Response
 
+from loader import config, node_latency_cache, semaphore, proxy_health
+from utils import metrics, tracer, cassette, connection_pool
 from models import Account
 from .exceptions.base import APIError, SessionRateLimited, ServerError
+from .probe import LatencyProbe
 
 
 class PipeNetworkAPI:
     SITE_API_URL = "https://api.pipecdn.app/api"
     EXTENSION_API_URL = "https://pipe-network-backend.pipecanary.workers.dev/api"
+    GEO_LOCATION_URL = "https://ipapi.co/json/"
+
+    # Static part of the session headers, only the token is stored per account.
+    # Bump the version when changing them so saved sessions log in again with the new template.
+    HEADERS = {
+        'accept': '*/*',
+        'accept-language': 'en-US,en;q=0.9',
+        'content-type': 'application/json',
+        'origin': 'https://pipecdn.app',
+        'priority': 'u=1, i',
+        'referer': 'https://pipecdn.app/',
+        'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
+    }
+    HEADERS_VERSION = 1
 
     def __init__(self, account: Account):
         self.account_data = account
@@ -19,31 +37,58 @@ class PipeNetworkAPI:
         self.session = self.setup_session()
 
     def setup_session(self) -> AsyncSession:
-        session = AsyncSession(impersonate="chrome124", verify=False, timeout=30)
-        session.headers = {
-            'accept': '*/*',
-            'accept-language': 'en-US,en;q=0.9',
-            'content-type': 'application/json',
-            'origin': 'https://pipecdn.app',
-            'priority': 'u=1, i',
-            'referer': 'https://pipecdn.app/',
-            'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
-        }
-
+        proxies = None
         if self.account_data.proxy:
-            session.proxies = {
+            proxies = {
                 "http": self.account_data.proxy.as_url,
                 "https": self.account_data.proxy.as_url,
             }
 
+        session = connection_pool.session(proxies, impersonate="chrome124", verify=False, timeout=30)
+        session.headers = dict(self.HEADERS)
         return session
 
+    @property
+    def proxy_id(self) -> str:
+        """Proxy address without credentials, safe to put into traces"""
+        proxy = self.account_data.proxy
+        return f"{proxy.host}:{proxy.port}" if proxy else "direct"
+
+    async def close(self) -> None:
+        await self.session.close()
+
+    def _record_request(self, endpoint: str, started: float, failed: bool, error: Exception = None) -> None:
+        latency = time.perf_counter() - started
+
+        metrics.inc(f"http.requests.{endpoint}")
+        metrics.observe(f"http.latency_ms.{endpoint}", latency * 1000)
+        if failed:
+            metrics.inc(f"http.errors.{endpoint}")
+
+        semaphore.observe(latency, error=failed)
+        proxy_health.record(
+            self.account_data.proxy,
+            success=error is None,
+            timeout=error is not None and "timed out" in str(error).lower(),
+        )
+
+    async def _clear_get(self, url: str, headers: dict = None, cookies: dict = None) -> Response:
+        async with connection_pool.session(self.session.proxies or None, impersonate="chrome124", verify=False, timeout=15) as session:
+            return await session.get(url, headers=headers, cookies=cookies)
+
     async def clear_request(self, url: str, headers: dict = None, cookies: dict = None) -> Response:
-        session = AsyncSession(impersonate="chrome124", verify=False, timeout=15)
-        session.proxies = self.session.proxies
+        endpoint = urlparse(url).path or "/"
+        with tracer.span("http.request", endpoint=endpoint, method="GET", attempt=1, proxy=self.proxy_id) as span:
+            started = time.perf_counter()
+            try:
+                response = await cassette.call("GET", url, lambda: self._clear_get(url, headers, cookies))
+            except Exception as error:
+                self._record_request(endpoint, started, failed=True, error=error)
+                raise
 
-        response = await session.get(url, headers=headers, cookies=cookies)
-        return response
+            span.set_attribute("status_code", response.status_code)
+            self._record_request(endpoint, started, failed=response.status_code == 403 or response.status_code >= 500)
+            return response
 
     async def send_request(
             self,
@@ -76,28 +121,39 @@ class PipeNetworkAPI:
 
         url = url or f"{self.SITE_API_URL if api_type == 'SITE' else self.EXTENSION_API_URL}{method}"
         headers = headers or self.session.headers
+        endpoint = method or urlparse(url).path
 
         for attempt in range(max_retries):
             try:
-                if request_type == "POST":
-                    response = await self.session.post(url, json=json_data, params=params, headers=headers, cookies=cookies)
-                elif request_type == "OPTIONS":
-                    response = await self.session.options(url, headers=headers, cookies=cookies)
-                else:
-                    response = await self.session.get(url, params=params, headers=headers, cookies=cookies)
-
-                if verify:
-                    if response.status_code == 403:
-                        raise SessionRateLimited("Session is rate limited")
-                    if response.status_code in (500, 502, 503, 504):
-                        raise ServerError(f"Server error - {response.status_code}")
-
+                with tracer.span("http.request", endpoint=endpoint, method=request_type, attempt=attempt + 1, proxy=self.proxy_id) as span:
+                    started = time.perf_counter()
                     try:
-                        return verify_response(response.json())
-                    except json.JSONDecodeError:
-                        return response.text
-
-                return response.text
+                        if request_type == "POST":
+                            request = lambda: self.session.post(url, json=json_data, params=params, headers=headers, cookies=cookies)
+                        elif request_type == "OPTIONS":
+                            request = lambda: self.session.options(url, headers=headers, cookies=cookies)
+                        else:
+                            request = lambda: self.session.get(url, params=params, headers=headers, cookies=cookies)
+                        response = await cassette.call(request_type, url, request)
+                    except Exception as error:
+                        self._record_request(endpoint, started, failed=True, error=error)
+                        raise
+
+                    span.set_attribute("status_code", response.status_code)
+                    self._record_request(endpoint, started, failed=response.status_code == 403 or response.status_code >= 500)
+
+                    if verify:
+                        if response.status_code == 403:
+                            raise SessionRateLimited("Session is rate limited")
+                        if response.status_code in (500, 502, 503, 504):
+                            raise ServerError(f"Server error - {response.status_code}")
+
+                        try:
+                            return verify_response(response.json())
+                        except json.JSONDecodeError:
+                            return response.text
+
+                    return response.text
 
             except (ServerError, APIError, SessionRateLimited):
                 if attempt == max_retries - 1:
@@ -136,7 +192,7 @@ class PipeNetworkAPI:
             self.session.headers.update({"authorization": f"Bearer {response['token']}"})
             return response
 
-        raise APIError(f"账户登录失败: {response}")
+        raise APIError(f"账户登录失败: {response}", response if isinstance(response, dict) else None)
 
 
     async def login_in_extension(self):
@@ -150,7 +206,7 @@ class PipeNetworkAPI:
             self.session.headers.update({"authorization": f"Bearer {response['token']}"})
             return response
 
-        raise APIError(f"Failed to login account via extension: {response}")
+        raise APIError(f"Failed to login account via extension: {response}", response if isinstance(response, dict) else None)
 
 
     async def points(self) -> dict[str, Any]:
@@ -172,7 +228,7 @@ class PipeNetworkAPI:
             'user-agent': self.session.headers['user-agent'],
         }
 
-        return await self.clear_request("https://api.pipecdn.app/api/nodes", headers=headers)
+        return await self.clear_request(f"{self.SITE_API_URL}/nodes", headers=headers)
 
     async def test_ping(self, node_id: str, ip: str, latency: str, status: str = "online") -> dict[str, Any]:
         headers = {
@@ -257,18 +313,31 @@ class PipeNetworkAPI:
         return await self.send_request(method="/twitter/callback", request_type="POST", api_type="EXTENSION", json_data=json_data)
 
     async def test_node_latency(self, ip: str) -> int:
-        try:
-            start_time = time.time()
-            await self.clear_request(f"http://{ip}")
-            latency = int((time.time() - start_time) * 1000)
-        except RequestsError:
-            latency = -1
+        async def probe_node() -> int:
+            probe = LatencyProbe(
+                proxy=self.account_data.proxy,
+                samples=config.latency_probe.samples,
+                timeout=config.latency_probe.timeout,
+            )
+
+            result = await probe.measure(ip)
+            if not result["status"]:
+                return -1
+
+            proxy_health.observe_connect(self.account_data.proxy, result["connect_ms"])
+
+            return int(result["first_byte_ms"])
 
-        return latency
+        proxy_key = self.account_data.proxy.as_url if self.account_data.proxy else "direct"
+        with tracer.span("node.latency", node=ip, proxy=self.proxy_id) as span:
+            # A failed probe (-1) is retried by the next pass instead of being cached
+            latency = await node_latency_cache.get_or_compute((proxy_key, ip), probe_node, cacheable=lambda value: value >= 0)
+            span.set_attribute("latency_ms", latency)
+            return latency
 
 
     async def get_geo_location(self) -> dict[str, str]:
-        response = await self.clear_request(url="https://ipapi.co/json/")
+        response = await self.clear_request(url=self.GEO_LOCATION_URL)
         if response.status_code == 200:
             data = response.json()
             return {"ip": data["ip"], "location": f"{data['city']}, {data['region']}, {data['country_name']}"}
@@ -1,22 +1,35 @@
+import asyncio
 import random
-import time
 from datetime import datetime, timedelta
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, List
 
 import pytz
 from loguru import logger
-from loader import config
+from loader import config, pacer
 from models import Account, OperationResult, StatisticData
-from utils import error_handler
+from utils import error_handler, Pipeline, metrics, clock, tracer, token_expires_at
 
 from .api import PipeNetworkAPI
-from database import Accounts
+from .exceptions.base import APIError, ServerError, SessionRateLimited
+from database import Accounts, AccountState
 
 
 class Bot(PipeNetworkAPI):
+    # Swapped for an in-memory store by the simulation harness
+    accounts_store = Accounts
+
     def __init__(self, account: Account):
         super().__init__(account)
         self.account_data = account
+        self.account_record: Optional[AccountState] = None
+        self.next_run_at: Optional[datetime] = None
+        self.keepalive_due = True
+        # Set while a branch runs and hasn't stored its next slot yet
+        self.keepalive_pending = False
+        self.heartbeat_pending = False
+        # Profiling runs every branch on every pass, whatever the stored schedule says
+        self.ignore_schedule = False
+        self.timed_out = False
 
 
     @error_handler(return_operation_result=True)
@@ -32,22 +45,37 @@ class Bot(PipeNetworkAPI):
         )
 
     @error_handler(return_operation_result=False)
-    async def process_farming_actions(self) -> None:
-        if not await self._prepare_account():
+    async def process_farming_actions(self, ignore_schedule: bool = False) -> None:
+        self.ignore_schedule = ignore_schedule
+        with tracer.span("pass.prepare"):
+            prepared = await asyncio.wait_for(
+                self._prepare_account(verify_sleep=not ignore_schedule),
+                timeout=config.deadlines.phase_timeouts.get("prepare"),
+            )
+        if not prepared:
             return
 
-        node_data = await self.get_node_data()
-        if not node_data:
-            return
+        # Keepalive and heartbeat branches are independent and run concurrently;
+        # a pass woken only for its heartbeat skips the keepalive branch
+        pipeline = Pipeline("pass", timeouts=config.deadlines.phase_timeouts)
+        if self.keepalive_due:
+            self.keepalive_pending = True
+            pipeline.add("nodes", self.get_node_data)
+            pipeline.add("ping", self._process_nodes, depends_on=("nodes",))
+            pipeline.add("sleep", lambda _: self._update_sleep_time(), depends_on=("ping",))
+            if config.show_points_stats:
+                pipeline.add("points", lambda _: self._show_points(), depends_on=("ping",))
+        pipeline.add("heartbeat", self._process_heartbeat)
+
+        await pipeline.run()
 
-        await self._process_node(node_data)
-        await self._update_sleep_time()
-        await self._process_heartbeat()
+    async def _show_points(self) -> None:
+        response = await self.points_in_extension()
+        logger.info(f"账户: {self.account_data.email} | 总积分: {response['points']}")
 
-        if config.show_points_stats:
-            response = await self.points_in_extension()
-            logger.info(f"账户: {self.account_data.email} | 总积分: {response['points']}")
 
+    async def handle_timeout(self) -> None:
+        self.timed_out = True
 
     @error_handler(return_operation_result=True)
     async def process_export_stats(self) -> StatisticData:
@@ -85,15 +113,48 @@ class Bot(PipeNetworkAPI):
         return False
 
     async def _prepare_account(self, verify_sleep: bool = True) -> bool:
-        account = await Accounts.get_account(email=self.account_data.email)
-        if not account:
+        account = await self.accounts_store.get_state(self.account_data.email)
+        if account and self.handle_quarantine(account):
+            return False
+
+        if not account or not self.has_valid_session(account):
             return await self.login_new_account()
 
+        self.account_record = account
+
         if verify_sleep:
-            if await self.handle_sleep(account.sleep_until):
-                return False
+            self.keepalive_due = not await self.handle_sleep(account.sleep_until)
+            if not self.keepalive_due:
+                self._wake_at(account.sleep_until)
+                if await self.handle_heartbeat(account.next_heartbeat_in):
+                    self._wake_at(account.next_heartbeat_in)
+                    return False
+
+        self.session.headers.update({"authorization": f"Bearer {account.token}"})
+        return True
 
-        self.session.headers = account.headers
+    def has_valid_session(self, account: AccountState) -> bool:
+        if not account.token or account.headers_version != self.HEADERS_VERSION:
+            return False
+        if account.token_expires_at is None:
+            return True
+
+        # The token has to outlive the pass that is about to use it
+        deadline = clock.now() + timedelta(seconds=config.deadlines.pass_timeout)
+        return account.token_expires_at.replace(tzinfo=pytz.UTC) > deadline
+
+    async def _process_nodes(self, nodes: List[Dict[str, Any]]) -> bool:
+        if len(nodes) == 1:
+            await self._process_node(nodes[0])
+            return True
+
+        limiter = asyncio.Semaphore(config.latency_probe.concurrency)
+
+        async def process_limited(node: Dict[str, Any]) -> None:
+            async with limiter:
+                await self._process_node(node)
+
+        await asyncio.gather(*(process_limited(node) for node in nodes))
         return True
 
     @error_handler(return_operation_result=False)
@@ -112,6 +173,8 @@ class Bot(PipeNetworkAPI):
             latency=str(node_latency)
         )
 
+        if isinstance(response.get("points"), (int, float)):
+            metrics.inc("points.earned", response["points"])
         logger.success(
             f"账户: {self.account_data.email} | "
             f"测试节点 | 获得积分: {response['points']}"
@@ -120,14 +183,16 @@ class Bot(PipeNetworkAPI):
 
     @error_handler(return_operation_result=False)
     async def _process_heartbeat(self) -> None:
-        account = await Accounts.get_account(email=self.account_data.email)
-        if await self.handle_heartbeat(account.next_heartbeat_in):
+        account = self.account_record or await self.accounts_store.get_state(self.account_data.email)
+        if not self.ignore_schedule and await self.handle_heartbeat(account.next_heartbeat_in):
+            self._wake_at(account.next_heartbeat_in)
             return
 
+        self.heartbeat_pending = True
         logger.info(f"账户: {self.account_data.email} | 发送心跳中...")
         geo_location = await self.get_geo_location()
 
-        await self.heartbeat(ip=geo_location["ip"], location=geo_location["location"], timestamp=int(time.time() * 1000))
+        await self.heartbeat(ip=geo_location["ip"], location=geo_location["location"], timestamp=int(clock.time() * 1000))
         await self._update_sleep_time(heartbeat=True)
 
         logger.success(f"账户: {self.account_data.email} | 心跳已发送")
@@ -135,7 +200,10 @@ class Bot(PipeNetworkAPI):
     async def _update_sleep_time(self, heartbeat: bool = False) -> None:
         if heartbeat:
             sleep_until = self.get_next_heartbeat_time()
-            await Accounts.set_next_heartbeat_in(self.account_data.email, sleep_until)
+            await self.accounts_store.set_next_heartbeat_in(self.account_data.email, sleep_until)
+            self.heartbeat_pending = False
+            self._wake_at(sleep_until)
+            pacer.observe("heartbeat")
             logger.debug(
                 f"账户: {self.account_data.email} | "
                 f"下一次心跳时间更新为 {sleep_until}"
@@ -143,14 +211,17 @@ class Bot(PipeNetworkAPI):
 
         else:
             sleep_until = self.get_sleep_until()
-            await Accounts.set_sleep_until(self.account_data.email, sleep_until)
+            await self.accounts_store.set_sleep_until(self.account_data.email, sleep_until)
+            self.keepalive_pending = False
+            self._wake_at(sleep_until)
+            pacer.observe("keepalive")
             logger.debug(
                 f"账户: {self.account_data.email} | "
                 f"休眠时间已更新为 {sleep_until}"
             )
 
     @error_handler(return_operation_result=False)
-    async def get_node_data(self) -> Optional[Dict[str, Any]]:
+    async def get_node_data(self) -> Optional[List[Dict[str, Any]]]:
         response = await self.nodes()
         if not response or not response.text:
             return None
@@ -159,44 +230,92 @@ class Bot(PipeNetworkAPI):
         if not node_data:
             return None
 
-        node = node_data[0]
-        if not self._validate_node_data(node):
-            return None
+        if not config.latency_probe.probe_all_nodes:
+            node_data = node_data[:1]
 
-        return node
+        nodes = [node for node in node_data if self._validate_node_data(node)]
+        return nodes or None
 
     @staticmethod
     def _validate_node_data(node: Dict[str, Any]) -> bool:
         required_fields = {'node_id', 'ip'}
         return all(field in node for field in required_fields)
 
+    def handle_quarantine(self, account: AccountState) -> bool:
+        if account.disabled:
+            self.next_run_at = clock.now() + timedelta(seconds=config.quarantine.backoff_max)
+            logger.debug(f"账户: {self.account_data.email} | 已禁用: {account.last_error}")
+            return True
+
+        if account.quarantined_until and account.quarantined_until.replace(tzinfo=pytz.UTC) > clock.now():
+            self.next_run_at = account.quarantined_until
+            logger.debug(f"账户: {self.account_data.email} | 隔离中，直到 {account.quarantined_until}")
+            return True
+
+        return False
+
+    async def _register_login_failure(self, error: APIError | SessionRateLimited) -> None:
+        # Server errors and throttling say nothing about the account itself
+        if isinstance(error, (ServerError, SessionRateLimited)) or error.is_rate_limited:
+            return
+
+        account = await self.accounts_store.register_failure(
+            email=self.account_data.email,
+            error=str(error),
+            retryable=error.is_retryable,
+            backoff_base=config.quarantine.backoff_base,
+            backoff_max=config.quarantine.backoff_max,
+        )
+
+        if account.disabled:
+            metrics.inc("quarantine.disabled")
+            logger.warning(f"账户: {self.account_data.email} | 登录失败且无法重试，账户已禁用")
+        else:
+            metrics.inc("quarantine.quarantined")
+            self.next_run_at = account.quarantined_until
+            logger.warning(
+                f"账户: {self.account_data.email} | 连续登录失败 {account.failure_count} 次，"
+                f"隔离至 {account.quarantined_until}"
+            )
+
     @error_handler(return_operation_result=False)
     async def login_new_account(self) -> bool:
         logger.info(f"账户: {self.account_data.email} | 通过扩展程序登录...")
-        await self.login_in_extension()
+        try:
+            response = await self.login_in_extension()
+        except (APIError, SessionRateLimited) as error:
+            await self._register_login_failure(error)
+            raise
 
-        await Accounts.create_account(
+        await self.accounts_store.create_account(
             email=self.account_data.email,
-            headers=self.session.headers
+            token=response["token"],
+            token_expires_at=token_expires_at(response["token"]),
+            headers_version=self.HEADERS_VERSION,
         )
         logger.success(f"账户: {self.account_data.email} | 已登录 | Session 已保存")
         return True
 
-    @staticmethod
-    def get_sleep_until() -> datetime:
-        duration = timedelta(seconds=config.keepalive_interval)
-        return datetime.now(pytz.UTC) + duration
+    def _wake_at(self, when: Optional[datetime]) -> None:
+        """Schedules the next pass for whichever of keepalive and heartbeat is due first"""
+        if when is None:
+            return
 
-    @staticmethod
-    def get_next_heartbeat_time() -> datetime:
-        duration = timedelta(hours=config.heartbeat_interval)
-        return datetime.now(pytz.UTC) + duration
+        when = when.replace(tzinfo=pytz.UTC)
+        if self.next_run_at is None or when < self.next_run_at:
+            self.next_run_at = when
+
+    def get_sleep_until(self) -> datetime:
+        return pacer.next_slot(self.account_data.email, "keepalive", config.keepalive_interval)
+
+    def get_next_heartbeat_time(self) -> datetime:
+        return pacer.next_slot(self.account_data.email, "heartbeat", config.heartbeat_interval * 3600)
 
     async def handle_sleep(self, sleep_until: datetime) -> bool:
         if not sleep_until:
             return False
 
-        current_time = datetime.now(pytz.UTC)
+        current_time = clock.now()
         sleep_until = sleep_until.replace(tzinfo=pytz.UTC)
 
         if sleep_until > current_time:
@@ -215,7 +334,7 @@ class Bot(PipeNetworkAPI):
         if not next_heartbeat_in:
             return False
 
-        current_time = datetime.now(pytz.UTC)
+        current_time = clock.now()
         next_heartbeat_in = next_heartbeat_in.replace(tzinfo=pytz.UTC)
 
         if next_heartbeat_in > current_time:
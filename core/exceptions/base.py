@@ -1,5 +1,7 @@
 class APIError(Exception):
     BASE_MESSAGES = ["refresh your captcha!!", "Incorrect answer. Try again!", "Email not verified , Please check spam folder incase you did not get email", "email already exists"]
+    NON_RETRYABLE_MESSAGES = ["email not verified", "invalid credentials", "invalid email or password", "incorrect password", "user not found"]
+    RATE_LIMIT_MESSAGES = ["rate limit", "too many requests", "too many attempts", "try again later"]
     """Base class for API exceptions"""
 
     def __init__(self, error: str, response_data: dict = None):
@@ -11,6 +13,16 @@ class APIError(Exception):
         if self.response_data and "message" in self.response_data:
             return self.response_data["message"]
 
+    @property
+    def is_retryable(self) -> bool:
+        details = f"{self.error} {self.response_data or ''}".lower()
+        return not any(message in details for message in self.NON_RETRYABLE_MESSAGES)
+
+    @property
+    def is_rate_limited(self) -> bool:
+        details = f"{self.error} {self.response_data or ''}".lower()
+        return any(message in details for message in self.RATE_LIMIT_MESSAGES)
+
     def __str__(self):
         return self.error
 
@@ -0,0 +1,114 @@
+import asyncio
+import math
+import os
+import socket
+import uuid
+from typing import Dict, List
+
+from loguru import logger
+
+from loader import config
+from models import Account
+from utils import metrics
+from database import Leases, Workers
+
+from .scheduler import FarmScheduler
+
+
+class LeaseManager:
+    """
+    Shares the accounts of ``farm.txt`` between several processes using one database.
+
+    Every worker registers itself with a heartbeat and holds a time-limited lease per account
+    it farms. Each cycle it renews its leases, computes its fair share (accounts / live
+    workers), releases idle accounts above that share and claims free or expired ones
+    below it, in batches. A worker that dies stops renewing, so its leases expire after
+    ``ttl`` and are taken over by the others; a worker that joins makes the others shrink
+    to the new fair share on their next cycle.
+    """
+
+    def __init__(self, scheduler: FarmScheduler):
+        self.scheduler = scheduler
+        self.host = socket.gethostname()
+        self.worker_id = f"{self.host}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.accounts: Dict[str, Account] = {}
+        self.owned: set[str] = set()
+
+    def set_accounts(self, accounts: List[Account]) -> tuple[int, int, int]:
+        """Replaces the candidate accounts, returns the scheduler's added/removed/updated counts for owned ones"""
+        self.accounts = {account.email: account for account in accounts}
+        return self.scheduler.sync_accounts([self.accounts[email] for email in self.owned if email in self.accounts])
+
+    async def run(self, accounts: List[Account]) -> None:
+        self.set_accounts(accounts)
+        logger.info(f"Worker {self.worker_id} | 按租约分配账户，共 {len(self.accounts)} 个账户")
+
+        try:
+            while True:
+                try:
+                    await self.rebalance()
+                except Exception as error:
+                    # Keep farming what we own, the leases are still valid for ttl seconds
+                    logger.error(f"Worker {self.worker_id} | 租约更新失败: {error}")
+                await asyncio.sleep(config.leases.renew_interval)
+        finally:
+            await self.shutdown()
+
+    async def rebalance(self) -> None:
+        ttl = config.leases.ttl
+        await Workers.heartbeat(self.worker_id, self.host)
+        workers = max(await Workers.count_live(ttl), 1)
+
+        owned = await Leases.renew(self.worker_id, ttl)
+        lost = self.owned - owned
+        for email in lost:
+            self.scheduler.remove_account(email)
+        if lost:
+            metrics.inc("leases.lost", len(lost))
+            logger.warning(f"Worker {self.worker_id} | {len(lost)} 个账户的租约已过期并被其他进程接管")
+
+        # Accounts removed from farm.txt
+        stale = [email for email in owned if email not in self.accounts]
+        if stale:
+            await Leases.release(self.worker_id, stale)
+            owned.difference_update(stale)
+
+        fair_share = math.ceil(len(self.accounts) / workers)
+        if len(owned) > fair_share:
+            idle = [email for email in owned if email not in self.scheduler.in_flight]
+            excess = idle[:len(owned) - fair_share]
+            await Leases.release(self.worker_id, excess)
+            for email in excess:
+                self.scheduler.remove_account(email)
+            owned.difference_update(excess)
+            metrics.inc("leases.released", len(excess))
+            logger.info(f"Worker {self.worker_id} | 释放 {len(excess)} 个账户给其他进程")
+
+        elif len(owned) < fair_share:
+            limit = min(config.leases.batch_size, fair_share - len(owned))
+            candidates = [email for email in self.accounts if email not in owned]
+            claimed = await Leases.claim(self.worker_id, candidates, limit, ttl)
+            for email in claimed:
+                self.scheduler.add_account(self.accounts[email])
+            owned.update(claimed)
+            if claimed:
+                metrics.inc("leases.claimed", len(claimed))
+                logger.info(f"Worker {self.worker_id} | 领取 {len(claimed)} 个账户")
+
+        self.owned = owned
+        metrics.set_gauge("leases.owned", len(owned))
+        metrics.set_gauge("leases.workers", workers)
+        logger.debug(f"Worker {self.worker_id} | 持有 {len(owned)}/{len(self.accounts)} 个账户，在线进程 {workers}")
+
+    async def shutdown(self) -> None:
+        for email in list(self.owned):
+            self.scheduler.remove_account(email)
+
+        try:
+            await Leases.release(self.worker_id)
+            await Workers.unregister(self.worker_id)
+        except Exception as error:
+            logger.warning(f"Worker {self.worker_id} | 释放租约失败，将在 {config.leases.ttl:.0f} 秒后过期: {error}")
+        else:
+            logger.info(f"Worker {self.worker_id} | 已释放 {len(self.owned)} 个账户的租约")
+        self.owned = set()
@@ -0,0 +1,191 @@
+import asyncio
+import base64
+import ipaddress
+import statistics
+import time
+from typing import Optional, Tuple
+
+from better_proxy import Proxy
+from loguru import logger
+
+from models import ProbeResult
+from utils import metrics
+
+
+class ProbeError(Exception):
+    """Raised when a node can't be probed"""
+
+    pass
+
+
+class LatencyProbe:
+    """
+    Lightweight HTTP latency probe over plain asyncio streams.
+
+    The connection is opened once (directly or through the account's HTTP/SOCKS5 proxy),
+    warmed up with one request and then reused for ``samples`` keep-alive requests, so the
+    reported first-byte time is the request round trip without handshake costs.
+    """
+
+    REQUEST_TEMPLATE = (
+        "HEAD / HTTP/1.1\r\n"
+        "Host: {host}\r\n"
+        "User-Agent: Mozilla/5.0\r\n"
+        "Accept: */*\r\n"
+        "Connection: keep-alive\r\n\r\n"
+    )
+
+    def __init__(self, proxy: Optional[Proxy] = None, samples: int = 3, timeout: float = 5.0):
+        self.proxy = proxy
+        self.samples = max(samples, 1)
+        self.timeout = timeout
+
+    @staticmethod
+    def _split_address(address: str, default_port: int = 80) -> Tuple[str, int]:
+        address = address.removeprefix("http://").rstrip("/")
+        # "host:port" or "[ipv6]:port"; any other colon belongs to a bare IPv6 address
+        if address.startswith("["):
+            host, _, rest = address[1:].partition("]")
+            port = rest.removeprefix(":")
+            return host, int(port) if port.isdigit() else default_port
+
+        if address.count(":") == 1:
+            host, _, port = address.partition(":")
+            if port.isdigit():
+                return host, int(port)
+
+        return address, default_port
+
+    async def _open_connection(self, host: str, port: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        if not self.proxy:
+            return await asyncio.open_connection(host, port)
+
+        reader, writer = await asyncio.open_connection(self.proxy.host, self.proxy.port)
+        try:
+            if self.proxy.protocol in ("http", "https"):
+                await self._http_connect(reader, writer, host, port)
+            elif self.proxy.protocol == "socks5":
+                await self._socks5_connect(reader, writer, host, port)
+            else:
+                raise ProbeError(f"Unsupported proxy protocol: {self.proxy.protocol}")
+        except BaseException:
+            writer.close()
+            raise
+
+        return reader, writer
+
+    async def _http_connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, port: int) -> None:
+        request = f"CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+        if self.proxy.login:
+            credentials = base64.b64encode(f"{self.proxy.login}:{self.proxy.password or ''}".encode()).decode()
+            request += f"Proxy-Authorization: Basic {credentials}\r\n"
+
+        writer.write(f"{request}\r\n".encode())
+        await writer.drain()
+
+        headers = await reader.readuntil(b"\r\n\r\n")
+        status_line = headers.split(b"\r\n", 1)[0]
+        status_parts = status_line.split()
+        if len(status_parts) < 2 or status_parts[1] != b"200":
+            raise ProbeError(f"Proxy refused CONNECT: {status_line.decode(errors='replace')}")
+
+    async def _socks5_connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, port: int) -> None:
+        methods = b"\x00\x02" if self.proxy.login else b"\x00"
+        writer.write(b"\x05" + bytes([len(methods)]) + methods)
+        await writer.drain()
+
+        version, method = await reader.readexactly(2)
+        if version != 5 or method == 0xFF:
+            raise ProbeError("SOCKS5 proxy rejected authentication methods")
+
+        if method == 0x02:
+            login = self.proxy.login.encode()
+            password = (self.proxy.password or "").encode()
+            writer.write(b"\x01" + bytes([len(login)]) + login + bytes([len(password)]) + password)
+            await writer.drain()
+
+            _, auth_status = await reader.readexactly(2)
+            if auth_status != 0:
+                raise ProbeError("SOCKS5 proxy authentication failed")
+
+        try:
+            address = ipaddress.ip_address(host)
+            address_type = b"\x01" if address.version == 4 else b"\x04"
+            destination = address_type + address.packed
+        except ValueError:
+            destination = b"\x03" + bytes([len(host)]) + host.encode()
+
+        writer.write(b"\x05\x01\x00" + destination + port.to_bytes(2, "big"))
+        await writer.drain()
+
+        _, reply, _, bound_type = await reader.readexactly(4)
+        if reply != 0:
+            raise ProbeError(f"SOCKS5 proxy failed to connect: code {reply}")
+
+        if bound_type == 0x01:
+            await reader.readexactly(4 + 2)
+        elif bound_type == 0x04:
+            await reader.readexactly(16 + 2)
+        else:
+            length = (await reader.readexactly(1))[0]
+            await reader.readexactly(length + 2)
+
+    async def _request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request: bytes) -> Tuple[float, bool]:
+        """Sends one HEAD request, returns first-byte time in ms and whether the connection is reusable"""
+        started = time.perf_counter()
+        writer.write(request)
+        await writer.drain()
+
+        first_byte = await reader.readexactly(1)
+        first_byte_ms = (time.perf_counter() - started) * 1000
+
+        headers = (first_byte + await reader.readuntil(b"\r\n\r\n")).lower()
+        keep_alive = b"connection: close" not in headers and headers.startswith(b"http/1.1")
+        return first_byte_ms, keep_alive
+
+    async def _measure(self, host: str, port: int) -> ProbeResult:
+        request = self.REQUEST_TEMPLATE.format(host=host).encode()
+        connect_times, first_byte_times = [], []
+        reader = writer = None
+
+        try:
+            # One warm-up request, then the measured samples
+            for attempt in range(self.samples + 1):
+                if writer is None:
+                    started = time.perf_counter()
+                    reader, writer = await self._open_connection(host, port)
+                    connect_times.append((time.perf_counter() - started) * 1000)
+
+                first_byte_ms, keep_alive = await self._request(reader, writer, request)
+                if attempt > 0:
+                    first_byte_times.append(first_byte_ms)
+
+                if not keep_alive:
+                    writer.close()
+                    writer = None
+
+        finally:
+            if writer is not None:
+                writer.close()
+
+        return ProbeResult(
+            host=host,
+            connect_ms=statistics.median(connect_times),
+            first_byte_ms=statistics.median(first_byte_times),
+            samples=first_byte_times,
+            status=True,
+        )
+
+    async def measure(self, address: str) -> ProbeResult:
+        host, port = self._split_address(address)
+
+        try:
+            result = await asyncio.wait_for(self._measure(host, port), timeout=self.timeout)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ProbeError, OSError) as error:
+            metrics.inc("probe.failures")
+            logger.debug(f"Latency probe to {address} failed: {error or type(error).__name__}")
+            return ProbeResult(host=host, connect_ms=-1, first_byte_ms=-1, samples=[], status=False)
+
+        metrics.observe("probe.connect_ms", result["connect_ms"])
+        metrics.observe("probe.first_byte_ms", result["first_byte_ms"])
+        return result
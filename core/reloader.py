@@ -0,0 +1,95 @@
+from pathlib import Path
+from typing import List
+
+from loguru import logger
+
+from loader import config, semaphore, node_latency_cache, pacer, proxy_health, error_aggregator
+from models import Config
+from utils import ConfigLoader, ConfigurationError, ConfigWatcher, tracer, connection_pool
+
+from .leases import LeaseManager
+from .scheduler import FarmScheduler
+
+
+class ConfigReloader:
+    """
+    Re-reads settings.yaml, farm.txt and proxies.txt when they change and applies them in place.
+
+    Settings that are read on every use (intervals, deadlines, probe options...) take effect
+    immediately; long-lived components are re-tuned here. Added accounts are scheduled,
+    removed ones finish their current pass and stop, and proxy changes apply from the next pass.
+    Monitoring intervals, the dashboard, the tracing switch/output, the database, lease, cassette and warm restart settings
+    still require a restart.
+    With leases enabled the new account list goes to the lease manager, which only schedules the owned ones.
+    """
+
+    RESTART_ONLY_FIELDS = frozenset({"database", "leases", "cassette", "monitoring", "dashboard", "warm_restart", "accounts_to_farm", "accounts_to_register", "module"})
+
+    def __init__(self, scheduler: FarmScheduler, lease_manager: LeaseManager):
+        self.scheduler = scheduler
+        self.lease_manager = lease_manager
+        self.loader = ConfigLoader()
+        self.watcher = ConfigWatcher(self.loader.watched_files, interval=config.hot_reload.interval)
+
+    async def watch(self) -> None:
+        if config.hot_reload.enabled:
+            await self.watcher.watch(self.reload)
+
+    async def reload(self, changed_files: List[Path]) -> None:
+        logger.info(f"Reloading configuration, changed: {', '.join(path.name for path in changed_files)}")
+
+        try:
+            new_config = self.loader.load(exit_on_error=False)
+        except ConfigurationError:
+            logger.warning("Keeping the current configuration")
+            return
+
+        await self._apply_settings(new_config)
+
+        config.accounts_to_farm[:] = new_config.accounts_to_farm
+        if config.module == "farm":
+            if config.leases.enabled:
+                added, removed, updated = self.lease_manager.set_accounts(new_config.accounts_to_farm)
+            else:
+                added, removed, updated = self.scheduler.sync_accounts(new_config.accounts_to_farm)
+            logger.success(f"Configuration reloaded | accounts added: {added}, removed: {removed}, updated: {updated}")
+        else:
+            logger.success("Configuration reloaded")
+
+    async def _apply_settings(self, new_config: Config) -> None:
+        for field in Config.model_fields:
+            if field not in self.RESTART_ONLY_FIELDS:
+                setattr(config, field, getattr(new_config, field))
+
+        if semaphore.adaptive:
+            semaphore.min_limit = config.adaptive_concurrency.min_threads
+            semaphore.max_limit = max(config.adaptive_concurrency.max_threads, semaphore.min_limit)
+            semaphore.target_latency = config.adaptive_concurrency.target_latency
+            semaphore.max_error_rate = config.adaptive_concurrency.max_error_rate
+            semaphore.max_loop_lag = config.adaptive_concurrency.max_loop_lag
+            await semaphore.set_limit(min(max(semaphore.limit, semaphore.min_limit), semaphore.max_limit))
+        elif semaphore.limit != config.threads:
+            await semaphore.set_limit(config.threads)
+
+        node_latency_cache.ttl = config.latency_probe.cache_ttl
+
+        pacer.enabled = config.pacing.enabled
+        pacer.min_gap_ratio = config.pacing.min_gap_ratio
+
+        proxy_health.failure_threshold = config.proxy_health.failure_threshold
+        proxy_health.min_success_rate = config.proxy_health.min_success_rate
+        proxy_health.check_timeout = config.proxy_health.check_timeout
+
+        # Sessions are created per pass, so switching applies from the next one
+        connection_pool.configure(
+            enabled=config.connection_sharing.enabled,
+            idle_timeout=config.connection_sharing.idle_timeout,
+        )
+
+        tracer.sample_rate = config.tracing.sample_rate
+        tracer.slow_threshold = config.tracing.slow_threshold
+
+        error_aggregator.configure(
+            summary_interval=config.error_reporting.summary_interval,
+            traceback_sample_rate=config.error_reporting.traceback_sample_rate,
+        )
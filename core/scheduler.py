@@ -0,0 +1,232 @@
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Type
+
+import pytz
+from loguru import logger
+
+from loader import config, semaphore, proxy_health, pacer
+from models import Account
+from utils import metrics, clock, tracer
+
+from .bot import Bot
+
+
+class FarmScheduler:
+    """
+    Runs every farming account in its own loop.
+
+    Each account sleeps until its next due time instead of being polled in fixed batches,
+    so a slow account only holds its own concurrency slot. A pass that exceeds
+    ``deadlines.pass_timeout`` (or a phase that exceeds its own deadline) is cancelled and
+    the account is retried with exponential backoff.
+
+    ``drain`` stops scheduling new passes and waits for running ones; the due times it
+    leaves behind can be saved with ``snapshot`` and handed to ``restore`` after a
+    restart, so resumed accounts skip the start delay and keep their schedule.
+
+    With ``back_to_back`` (profiling) every account runs its passes one after another,
+    without the start delay or the wait until its next due time, and every pass runs the
+    keepalive and heartbeat branches even when the stored schedule says they aren't due.
+    """
+
+    def __init__(self, idle_interval: float = 10, bot_class: Type[Bot] = Bot):
+        self.idle_interval = idle_interval
+        self.bot_class = bot_class
+        self.accounts: Dict[str, Account] = {}
+        self.next_run: Dict[str, float] = {}
+        self.in_flight: Set[str] = set()
+        self.failures: Dict[str, int] = {}
+        self.resume_at: Dict[str, float] = {}
+        self.draining = False
+        self.back_to_back = False
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(self, accounts: List[Account], passes: Optional[int] = None, back_to_back: bool = False) -> None:
+        self.back_to_back = back_to_back
+        for account in accounts:
+            self.add_account(account, passes=passes)
+
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            self._tasks = {email: task for email, task in self._tasks.items() if not task.done()}
+
+    def add_account(self, account: Account, passes: Optional[int] = None) -> None:
+        task = self._tasks.get(account.email)
+        if task is not None and not task.done():
+            self.accounts[account.email] = account
+            return
+
+        self.accounts[account.email] = account
+        self._tasks[account.email] = asyncio.create_task(self._account_loop(account.email, passes))
+        pacer.set_population(len(self.accounts))
+
+    def remove_account(self, email: str) -> None:
+        """Stops scheduling the account, a pass that is already running is allowed to finish"""
+        self.accounts.pop(email, None)
+        self.next_run.pop(email, None)
+        pacer.set_population(len(self.accounts))
+
+        task = self._tasks.get(email)
+        if task is not None and email not in self.in_flight:
+            task.cancel()
+
+        logger.info(f"账户: {email} | 已从挂机列表移除")
+
+    def sync_accounts(self, accounts: List[Account]) -> tuple[int, int, int]:
+        """Applies a reloaded account list, returns the number of added, removed and updated accounts"""
+        new_accounts = {account.email: account for account in accounts}
+        added = removed = updated = 0
+
+        for email in list(self.accounts):
+            if email not in new_accounts:
+                self.remove_account(email)
+                removed += 1
+
+        for email, account in new_accounts.items():
+            current = self.accounts.get(email)
+            if current is None:
+                self.add_account(account)
+                added += 1
+            elif current.proxy != account.proxy or current.password != account.password:
+                # Bots are created per pass, so the change is picked up by the next one
+                current.proxy = account.proxy
+                current.password = account.password
+                updated += 1
+
+        return added, removed, updated
+
+    def _backoff(self, email: str) -> float:
+        failures = self.failures.get(email, 0) + 1
+        self.failures[email] = failures
+        delay = min(config.deadlines.backoff_base * 2 ** (failures - 1), config.deadlines.backoff_max)
+        return delay * random.uniform(0.8, 1.2)
+
+    def _delay_until(self, next_run_at: Optional[datetime]) -> float:
+        if next_run_at is None:
+            return self.idle_interval
+
+        delay = (next_run_at.replace(tzinfo=pytz.UTC) - clock.now()).total_seconds()
+        return max(delay, 1.0)
+
+    async def _initial_delay(self, email: str) -> None:
+        if self.back_to_back:
+            return
+
+        resume_at = self.resume_at.pop(email, None)
+        if resume_at is not None:
+            self.next_run[email] = resume_at
+            await asyncio.sleep(max(resume_at - clock.time(), 0))
+            return
+
+        if config.delay_before_start.min <= 0:
+            return
+
+        random_delay = random.randint(config.delay_before_start.min, config.delay_before_start.max)
+        logger.info(f"账户: {email} | 开始挂机，等待: {random_delay} 秒")
+        await asyncio.sleep(random_delay)
+
+    async def _run_pass(self, account: Account) -> float:
+        if not proxy_health.is_healthy(account.proxy):
+            metrics.inc("scheduler.postponed_unhealthy_proxy")
+            logger.debug(f"账户: {account.email} | 代理不可用，推迟 {proxy_health.check_interval:.0f} 秒")
+            return proxy_health.check_interval
+
+        async with semaphore:
+            bot = self.bot_class(account)
+            self.in_flight.add(account.email)
+            started = time.perf_counter()
+
+            with tracer.span("pass", account=account.email, proxy=bot.proxy_id) as span:
+                try:
+                    await asyncio.wait_for(
+                        bot.process_farming_actions(ignore_schedule=self.back_to_back),
+                        timeout=config.deadlines.pass_timeout,
+                    )
+                except asyncio.TimeoutError as error:
+                    bot.timed_out = True
+                    span.set_error(error)
+                    metrics.inc("scheduler.pass_timeouts")
+                finally:
+                    await bot.close()
+                    self.in_flight.discard(account.email)
+                    metrics.observe("scheduler.pass_ms", (time.perf_counter() - started) * 1000)
+
+        if bot.timed_out:
+            delay = self._backoff(account.email)
+            metrics.inc("scheduler.backoffs")
+            logger.warning(f"账户: {account.email} | 挂机超时已取消，{delay:.0f} 秒后重试")
+            return delay
+
+        self.failures.pop(account.email, None)
+        if bot.keepalive_pending or bot.heartbeat_pending:
+            # A branch failed before storing its next slot, retry it instead of waiting for the other one
+            return min(self._delay_until(bot.next_run_at), self.idle_interval)
+        return self._delay_until(bot.next_run_at)
+
+    async def _account_loop(self, email: str, passes: Optional[int]) -> None:
+        await self._initial_delay(email)
+
+        completed_passes = 0
+        while (passes is None or completed_passes < passes) and not self.draining:
+            # Re-read on every pass, hot reload may have replaced or removed the account
+            account = self.accounts.get(email)
+            if account is None:
+                break
+
+            delay = await self._run_pass(account)
+            completed_passes += 1
+
+            if passes is not None and completed_passes >= passes:
+                break
+
+            if self.back_to_back:
+                continue
+
+            self.next_run[email] = clock.time() + delay
+            if self.draining:
+                return
+            await asyncio.sleep(delay)
+
+        self.next_run.pop(email, None)
+
+    async def drain(self, timeout: float) -> None:
+        """Stops starting passes, lets running ones finish within ``timeout`` and cancels the rest"""
+        self.draining = True
+        running = []
+        for email, task in self._tasks.items():
+            if email in self.in_flight:
+                running.append(task)
+            else:
+                task.cancel()
+
+        if running:
+            logger.info(f"Waiting for {len(running)} running passes to finish (up to {timeout:.0f}s)")
+            _, pending = await asyncio.wait(running, timeout=timeout)
+            for task in pending:
+                task.cancel()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            "next_run": {email: next_run for email, next_run in self.next_run.items() if email in self.accounts},
+            "failures": dict(self.failures),
+        }
+
+    def seed_wake_times(self, wake_times: Dict[str, datetime]) -> int:
+        """
+        Starts accounts that aren't due yet directly at their stored wake-up time, skipping
+        the start delay and a pass that would only read the database and go back to sleep.
+        Due times restored from a snapshot take precedence. Returns the number of seeded accounts.
+        """
+        seeded = 0
+        for email, wake_at in wake_times.items():
+            if email not in self.resume_at:
+                self.resume_at[email] = wake_at.timestamp()
+                seeded += 1
+        return seeded
+
+    def restore(self, state: Dict[str, Dict[str, float]]) -> None:
+        self.resume_at.update(state.get("next_run", {}))
+        self.failures.update(state.get("failures", {}))
@@ -0,0 +1,68 @@
+import json
+import os
+from pathlib import Path
+
+from loguru import logger
+
+from loader import node_latency_cache, proxy_health
+from utils import clock
+
+from .scheduler import FarmScheduler
+
+
+class StateSnapshot:
+    """
+    Saves the in-memory farming state on graceful shutdown and restores it on the next start.
+
+    The snapshot holds the scheduler's due times and backoff counters, the node latency
+    cache and proxy health. Session tokens are already persisted per account in the
+    database, so resumed accounts neither log in again nor wait for a start delay.
+    A snapshot is used once and ignored when it is older than ``max_age`` seconds.
+    """
+
+    VERSION = 1
+
+    def __init__(self, scheduler: FarmScheduler, path: str, max_age: float = 900):
+        self.scheduler = scheduler
+        self.path = Path(path)
+        self.max_age = max_age
+
+    def save(self) -> None:
+        state = {
+            "version": self.VERSION,
+            "saved_at": clock.time(),
+            "scheduler": self.scheduler.snapshot(),
+            "node_latency": [[list(key), value, remaining] for key, value, remaining in node_latency_cache.snapshot()],
+            "proxy_health": proxy_health.snapshot(),
+        }
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_name(f"{self.path.name}.tmp")
+        temporary_path.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
+        os.replace(temporary_path, self.path)
+        logger.info(f"Saved state snapshot of {len(state['scheduler']['next_run'])} accounts to {self.path}")
+
+    def restore(self) -> bool:
+        if not self.path.exists():
+            return False
+
+        try:
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as error:
+            logger.warning(f"Ignoring unreadable state snapshot {self.path}: {error}")
+            return False
+        finally:
+            self.path.unlink(missing_ok=True)
+
+        age = clock.time() - state.get("saved_at", 0)
+        if state.get("version") != self.VERSION or age > self.max_age:
+            logger.info(f"Ignoring state snapshot from {age:.0f}s ago")
+            return False
+
+        self.scheduler.restore(state["scheduler"])
+        # Cache TTLs keep running while the process is down
+        node_latency_cache.restore((tuple(key), value, remaining - age) for key, value, remaining in state["node_latency"])
+        proxy_health.restore(state["proxy_health"])
+
+        logger.success(f"Resumed from state snapshot ({len(state['scheduler']['next_run'])} accounts, saved {age:.0f}s ago)")
+        return True
@@ -1,2 +1,4 @@
-from .models import Accounts
-from .settings import initialize_database
+from .models import Accounts, Leases, Workers
+from .settings import initialize_database, close_database, build_tortoise_config
+from .writer import write_queue, WriteQueue
+from .queries import account_queries, AccountQueries, AccountState
@@ -0,0 +1,89 @@
+import json
+
+from loguru import logger
+from tortoise import connections
+from tortoise.transactions import in_transaction
+
+from utils.api_utils import token_expires_at
+
+
+# Columns added after the first release; generate_schemas(safe=True) only creates missing tables
+ACCOUNT_COLUMNS = {
+    "failure_count": {"sqlite": "INT NOT NULL DEFAULT 0", "postgres": "INT NOT NULL DEFAULT 0"},
+    "quarantined_until": {"sqlite": "TIMESTAMP", "postgres": "TIMESTAMPTZ"},
+    "disabled": {"sqlite": "INT NOT NULL DEFAULT 0", "postgres": "BOOL NOT NULL DEFAULT FALSE"},
+    "last_error": {"sqlite": "TEXT", "postgres": "TEXT"},
+    "token": {"sqlite": "TEXT", "postgres": "TEXT"},
+    "token_expires_at": {"sqlite": "TIMESTAMP", "postgres": "TIMESTAMPTZ"},
+    "headers_version": {"sqlite": "INT NOT NULL DEFAULT 0", "postgres": "INT NOT NULL DEFAULT 0"},
+}
+
+# Headers saved before the token columns existed were built from the first header template
+LEGACY_HEADERS_VERSION = 1
+
+
+def token_from_headers(headers) -> str | None:
+    """Extracts the bearer token from a legacy ``headers`` JSON value"""
+    if isinstance(headers, str):
+        headers = json.loads(headers)
+
+    authorization = (headers or {}).get("authorization", "")
+    return authorization.removeprefix("Bearer ") or None
+
+
+async def _get_columns(table: str) -> set[str]:
+    connection = connections.get("default")
+    if connection.capabilities.dialect == "sqlite":
+        _, rows = await connection.execute_query(f"PRAGMA table_info({table})")
+        return {row["name"] for row in rows}
+
+    _, rows = await connection.execute_query(
+        "SELECT column_name FROM information_schema.columns WHERE table_schema = current_schema() AND table_name = $1",
+        [table],
+    )
+    return {row["column_name"] for row in rows}
+
+
+async def apply_migrations() -> None:
+    connection = connections.get("default")
+    dialect = connection.capabilities.dialect
+    table = "pipe_network_accounts"
+    existing_columns = await _get_columns(table)
+
+    for column, definitions in ACCOUNT_COLUMNS.items():
+        if column in existing_columns:
+            continue
+
+        await connection.execute_script(f"ALTER TABLE {table} ADD COLUMN {column} {definitions[dialect]}")
+        logger.info(f"Database migration: added {table}.{column}")
+
+    if "headers" in existing_columns:
+        await _migrate_session_headers(table)
+
+
+async def _migrate_session_headers(table: str) -> None:
+    """Moves the token out of the per-row headers JSON and drops the column"""
+    connection = connections.get("default")
+    _, rows = await connection.execute_query(f"SELECT id, headers FROM {table} WHERE headers IS NOT NULL")
+
+    values = []
+    for row in rows:
+        token = token_from_headers(row["headers"])
+        if token:
+            values.append([token, token_expires_at(token), LEGACY_HEADERS_VERSION, row["id"]])
+
+    if connection.capabilities.dialect == "sqlite":
+        query = f"UPDATE {table} SET token = ?, token_expires_at = ?, headers_version = ? WHERE id = ?"
+    else:
+        query = f"UPDATE {table} SET token = $1, token_expires_at = $2, headers_version = $3 WHERE id = $4"
+
+    async with in_transaction() as transaction:
+        if values:
+            await transaction.execute_many(query, values)
+        await transaction.execute_script(f"ALTER TABLE {table} DROP COLUMN headers")
+
+    if connection.capabilities.dialect == "sqlite":
+        # Give the space of the dropped column back to the file system
+        await connection.execute_script("VACUUM")
+
+    logger.info(f"Database migration: moved session tokens of {len(rows)} accounts out of {table}.headers")
@@ -1 +1,2 @@
 from .accounts import Accounts
+from .leases import Leases, Workers
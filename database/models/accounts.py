@@ -1,21 +1,32 @@
-import pytz
-
-from datetime import datetime
+from datetime import datetime, timedelta
 from tortoise import Model, fields
+from tortoise.expressions import Q
 from loguru import logger
 
+from utils.clock import clock
+from utils.tracing import tracer
+from ..queries import account_queries, as_utc
+from ..writer import write_queue
+
 
 class Accounts(Model):
     email = fields.CharField(max_length=255, unique=True)
-    headers = fields.JSONField(null=True)
+    token = fields.TextField(null=True)
+    token_expires_at = fields.DatetimeField(null=True)
+    headers_version = fields.IntField(default=0)
     sleep_until = fields.DatetimeField(null=True)
     next_heartbeat_in = fields.DatetimeField(null=True)
     session_blocked_until = fields.DatetimeField(null=True)
+    failure_count = fields.IntField(default=0)
+    quarantined_until = fields.DatetimeField(null=True)
+    disabled = fields.BooleanField(default=False)
+    last_error = fields.TextField(null=True)
 
     class Meta:
         table = "pipe_network_accounts"
 
     @classmethod
+    @tracer.traced("db.get_account")
     async def get_account(cls, email: str):
         return await cls.get_or_none(email=email)
 
@@ -24,77 +35,89 @@ class Accounts(Model):
         return await cls.all()
 
     @classmethod
-    async def create_account(cls, email: str, headers: dict = None):
-        account = await cls.get_account(email=email)
-        if account is None:
-            account = await cls.create(email=email, headers=headers)
-            return account
-        else:
-            account.headers = headers
-            await account.save()
-            return account
+    @tracer.traced("db.get_account_state")
+    async def get_state(cls, email: str):
+        """Hot path of ``get_account``, returns an ``AccountState`` instead of a model"""
+        return await account_queries.get_state(email)
 
     @classmethod
-    async def delete_account(cls, email: str):
-        account = await cls.get_account(email=email)
-        if account is None:
+    @tracer.traced("db.get_wake_times")
+    async def get_wake_times(cls):
+        """Next wake-up of every account that isn't due yet, in one query"""
+        return await account_queries.fetch_wake_times(clock.now())
+
+    @classmethod
+    @tracer.traced("db.create_account")
+    @write_queue.mutation
+    async def create_account(
+        cls, email: str, token: str = None, token_expires_at: datetime = None, headers_version: int = 0
+    ) -> bool:
+        """Stores a new session for the account, returns True when the account row was created"""
+        if await account_queries.set_token(email, token, token_expires_at, headers_version):
             return False
 
-        await account.delete()
+        await cls.create(email=email, token=token, token_expires_at=token_expires_at, headers_version=headers_version)
         return True
 
     @classmethod
-    async def set_sleep_until(cls, email: str, sleep_until: datetime):
+    @write_queue.mutation
+    async def delete_account(cls, email: str):
         account = await cls.get_account(email=email)
         if account is None:
             return False
 
-        if sleep_until.tzinfo is None:
-            sleep_until = pytz.UTC.localize(sleep_until)
-        else:
-            sleep_until = sleep_until.astimezone(pytz.UTC)
-
-        account.sleep_until = sleep_until
-        await account.save()
+        await account.delete()
         return True
 
+    @classmethod
+    @tracer.traced("db.set_sleep_until")
+    @write_queue.mutation
+    async def set_sleep_until(cls, email: str, sleep_until: datetime):
+        return await account_queries.set_timestamp(email, "sleep_until", sleep_until)
 
     @classmethod
+    @tracer.traced("db.set_next_heartbeat_in")
+    @write_queue.mutation
     async def set_next_heartbeat_in(cls, email: str, next_heartbeat_in: datetime):
-        account = await cls.get_account(email=email)
-        if account is None:
-            return False
-
-        if next_heartbeat_in.tzinfo is None:
-            next_heartbeat_in = pytz.UTC.localize(next_heartbeat_in)
-        else:
-            next_heartbeat_in = next_heartbeat_in.astimezone(pytz.UTC)
-
-        account.next_heartbeat_in = next_heartbeat_in
-        await account.save()
-        return True
+        return await account_queries.set_timestamp(email, "next_heartbeat_in", next_heartbeat_in)
 
     @classmethod
+    @write_queue.mutation
     async def set_session_blocked_until(
         cls, email: str, session_blocked_until: datetime
+    ):
+        session_blocked_until = as_utc(session_blocked_until)
+        if not await account_queries.set_timestamp(email, "session_blocked_until", session_blocked_until):
+            await cls.create(email=email, session_blocked_until=session_blocked_until)
+
+        logger.info(
+            f"账户: {email} | 设置新会话: {session_blocked_until}"
+        )
+
+    @classmethod
+    @tracer.traced("db.register_failure")
+    @write_queue.mutation
+    async def register_failure(
+        cls, email: str, error: str, retryable: bool, backoff_base: float, backoff_max: float
     ):
         account = await cls.get_account(email=email)
         if account is None:
-            account = await cls.create_account(email=email)
-            account.session_blocked_until = session_blocked_until
-            await account.save()
-            logger.info(
-                f"账户: {email} | 设置新会话: {session_blocked_until}"
-            )
-            return
-
-        if session_blocked_until.tzinfo is None:
-            session_blocked_until = pytz.UTC.localize(session_blocked_until)
+            account = await cls.create(email=email)
+
+        account.failure_count += 1
+        account.last_error = error[:500]
+
+        if retryable:
+            delay = min(backoff_base * 2 ** (account.failure_count - 1), backoff_max)
+            account.quarantined_until = clock.now() + timedelta(seconds=delay)
         else:
-            session_blocked_until = session_blocked_until.astimezone(pytz.UTC)
+            account.disabled = True
 
-        account.session_blocked_until = session_blocked_until
         await account.save()
-        logger.info(
-            f"账户: {email} | 设置新会话: {session_blocked_until}"
-        )
+        return account
+
+    @classmethod
+    async def get_quarantined_accounts(cls):
+        return await cls.filter(
+            Q(disabled=True) | Q(quarantined_until__gt=clock.now())
+        ).order_by("-failure_count")
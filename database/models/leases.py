@@ -0,0 +1,92 @@
+import random
+from datetime import timedelta
+from typing import List, Set
+
+from tortoise import Model, fields
+
+from utils.clock import clock
+from utils.tracing import tracer
+
+
+class Workers(Model):
+    worker_id = fields.CharField(max_length=128, unique=True)
+    host = fields.CharField(max_length=255)
+    heartbeat_at = fields.DatetimeField()
+
+    class Meta:
+        table = "pipe_network_workers"
+
+    @classmethod
+    @tracer.traced("db.worker_heartbeat")
+    async def heartbeat(cls, worker_id: str, host: str) -> None:
+        await cls.update_or_create(worker_id=worker_id, defaults={"host": host, "heartbeat_at": clock.now()})
+
+    @classmethod
+    @tracer.traced("db.count_live_workers")
+    async def count_live(cls, ttl: float) -> int:
+        cutoff = clock.now() - timedelta(seconds=ttl)
+        await cls.filter(heartbeat_at__lt=cutoff).delete()
+        return await cls.filter(heartbeat_at__gte=cutoff).count()
+
+    @classmethod
+    async def unregister(cls, worker_id: str) -> None:
+        await cls.filter(worker_id=worker_id).delete()
+
+
+class Leases(Model):
+    email = fields.CharField(max_length=255, unique=True)
+    worker_id = fields.CharField(max_length=128, index=True)
+    expires_at = fields.DatetimeField(index=True)
+
+    class Meta:
+        table = "pipe_network_leases"
+
+    @classmethod
+    @tracer.traced("db.renew_leases")
+    async def renew(cls, worker_id: str, ttl: float) -> Set[str]:
+        """Extends every live lease of the worker, returns the emails it still owns"""
+        now = clock.now()
+        await cls.filter(worker_id=worker_id, expires_at__gt=now).update(expires_at=now + timedelta(seconds=ttl))
+        return set(await cls.filter(worker_id=worker_id, expires_at__gt=now).values_list("email", flat=True))
+
+    @classmethod
+    @tracer.traced("db.claim_leases")
+    async def claim(cls, worker_id: str, candidates: List[str], limit: int, ttl: float) -> Set[str]:
+        """
+        Claims up to ``limit`` of the candidates that have no lease or an expired one.
+
+        Both paths are conditional writes (insert on a unique email, update of an expired
+        row), so two workers racing for the same account can't both win it.
+        """
+        now = clock.now()
+        expires_at = now + timedelta(seconds=ttl)
+        leased = await cls.all().values_list("email", "expires_at")
+        live = {email for email, lease_expires_at in leased if lease_expires_at > now}
+        expired = {email for email, lease_expires_at in leased if lease_expires_at <= now}
+
+        free = [email for email in candidates if email not in live]
+        # Workers claiming at the same time mostly pick different accounts
+        chosen = random.sample(free, min(limit, len(free)))
+        if not chosen:
+            return set()
+
+        to_take_over = [email for email in chosen if email in expired]
+        to_insert = [email for email in chosen if email not in expired]
+
+        if to_take_over:
+            await cls.filter(email__in=to_take_over, expires_at__lte=now).update(worker_id=worker_id, expires_at=expires_at)
+        if to_insert:
+            await cls.bulk_create(
+                [cls(email=email, worker_id=worker_id, expires_at=expires_at) for email in to_insert],
+                ignore_conflicts=True,
+            )
+
+        return set(await cls.filter(email__in=chosen, worker_id=worker_id, expires_at__gt=now).values_list("email", flat=True))
+
+    @classmethod
+    @tracer.traced("db.release_leases")
+    async def release(cls, worker_id: str, emails: List[str] = None) -> None:
+        query = cls.filter(worker_id=worker_id)
+        if emails is not None:
+            query = query.filter(email__in=emails)
+        await query.delete()
@@ -0,0 +1,138 @@
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import pytz
+from tortoise import connections
+
+
+class AccountState(NamedTuple):
+    """Per-pass view of an account row, read without building a model instance"""
+
+    email: str
+    token: Optional[str]
+    token_expires_at: Optional[datetime]
+    headers_version: int
+    sleep_until: Optional[datetime]
+    next_heartbeat_in: Optional[datetime]
+    failure_count: int
+    quarantined_until: Optional[datetime]
+    disabled: bool
+    last_error: Optional[str]
+
+
+def as_utc(value: datetime) -> datetime:
+    return pytz.UTC.localize(value) if value.tzinfo is None else value.astimezone(pytz.UTC)
+
+
+def _read_datetime(value: Any) -> Optional[datetime]:
+    # SQLite returns the text Tortoise wrote ("YYYY-MM-DD HH:MM:SS[.ffffff]+00:00"), PostgreSQL a datetime
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value if value.tzinfo is not None else value.replace(tzinfo=pytz.UTC)
+
+
+class AccountQueries:
+    """
+    Column-targeted SQL for the account operations every farming pass makes.
+
+    The ORM builds a query and a model instance per call and ``save()`` rewrites every
+    column of the row; these statements read or write only the columns involved. Each
+    statement is a constant string per dialect, so it is parsed once and then served from
+    the driver's statement cache (sqlite3's per-connection cache, asyncpg's prepared
+    statements). The connection is looked up on every call, so the statements join the
+    write queue's batch transaction like ORM queries do.
+    """
+
+    TABLE = "pipe_network_accounts"
+    TIMESTAMP_COLUMNS = frozenset({"sleep_until", "next_heartbeat_in", "session_blocked_until"})
+    DATETIME_FIELDS = ("token_expires_at", "sleep_until", "next_heartbeat_in", "quarantined_until")
+
+    STATEMENTS = {
+        "get_state": f"SELECT {', '.join(AccountState._fields)} FROM {TABLE} WHERE email = ?",
+        "set_sleep_until": f"UPDATE {TABLE} SET sleep_until = ? WHERE email = ?",
+        "set_next_heartbeat_in": f"UPDATE {TABLE} SET next_heartbeat_in = ? WHERE email = ?",
+        "set_session_blocked_until": f"UPDATE {TABLE} SET session_blocked_until = ? WHERE email = ?",
+        "set_token": (
+            f"UPDATE {TABLE} SET token = ?, token_expires_at = ?, headers_version = ?, failure_count = 0, "
+            f"quarantined_until = NULL, disabled = ?, last_error = NULL WHERE email = ?"
+        ),
+        "fetch_wake_times": (
+            f"SELECT email, sleep_until, next_heartbeat_in, quarantined_until FROM {TABLE} WHERE disabled = ?"
+        ),
+    }
+
+    def __init__(self, connection_name: str = "default"):
+        self.connection_name = connection_name
+        self._statements: Dict[str, Dict[str, str]] = {}
+
+    def _statement(self, dialect: str, name: str) -> str:
+        statements = self._statements.get(dialect)
+        if statements is None:
+            statements = self._statements[dialect] = {
+                key: self._for_dialect(query, dialect) for key, query in self.STATEMENTS.items()
+            }
+        return statements[name]
+
+    @staticmethod
+    def _for_dialect(query: str, dialect: str) -> str:
+        if dialect == "sqlite":
+            return query
+
+        # asyncpg takes numbered placeholders
+        parts = query.split("?")
+        return "".join(f"{part}${index}" for index, part in enumerate(parts[:-1], start=1)) + parts[-1]
+
+    async def _execute(self, name: str, values: List[Any]):
+        connection = connections.get(self.connection_name)
+        return await connection.execute_query(self._statement(connection.capabilities.dialect, name), values)
+
+    def _state(self, row) -> AccountState:
+        state = AccountState(*row)
+        return state._replace(
+            disabled=bool(state.disabled),
+            **{field: _read_datetime(getattr(state, field)) for field in self.DATETIME_FIELDS},
+        )
+
+    async def get_state(self, email: str) -> Optional[AccountState]:
+        _, rows = await self._execute("get_state", [email])
+        return self._state(rows[0]) if rows else None
+
+    async def set_timestamp(self, email: str, column: str, value: Optional[datetime]) -> bool:
+        """Updates one timestamp column, returns False when the account doesn't exist"""
+        if column not in self.TIMESTAMP_COLUMNS:
+            raise ValueError(f"Not a schedule column: {column}")
+
+        updated, _ = await self._execute(f"set_{column}", [as_utc(value) if value else None, email])
+        return updated > 0
+
+    async def set_token(self, email: str, token: Optional[str], token_expires_at: Optional[datetime], headers_version: int) -> bool:
+        """Stores a new session and clears the failure state, returns False when the account doesn't exist"""
+        expires_at = as_utc(token_expires_at) if token_expires_at else None
+        updated, _ = await self._execute("set_token", [token, expires_at, headers_version, False, email])
+        return updated > 0
+
+    async def fetch_wake_times(self, now: datetime) -> Dict[str, datetime]:
+        """
+        When each enabled account that has nothing due at ``now`` next needs a pass: the
+        earlier of its keepalive and heartbeat, or the end of its quarantine if later.
+        """
+        _, rows = await self._execute("fetch_wake_times", [False])
+
+        wake_times = {}
+        for email, sleep_until, next_heartbeat_in, quarantined_until in rows:
+            if sleep_until is None or next_heartbeat_in is None:
+                continue
+
+            wake_at = min(_read_datetime(sleep_until), _read_datetime(next_heartbeat_in))
+            quarantined_until = _read_datetime(quarantined_until)
+            if quarantined_until is not None and quarantined_until > wake_at:
+                wake_at = quarantined_until
+            if wake_at > now:
+                wake_times[email] = wake_at
+
+        return wake_times
+
+
+account_queries = AccountQueries()
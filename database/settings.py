@@ -1,17 +1,60 @@
+from typing import Any, Dict
+
 from loguru import logger
 from tortoise import Tortoise
+from tortoise.backends.base.config_generator import expand_db_url
+
+from models import Config
+from .migrations import apply_migrations
+from .writer import write_queue
+
+
+MODELS = ["database.models.accounts", "database.models.leases"]
+
 
+def build_tortoise_config(
+        url: str,
+        pool_min: int = 1,
+        pool_max: int = 10,
+        sqlite_pragmas: Dict[str, Any] = None,
+        **extra_connections: str,
+) -> Dict[str, Any]:
+    """
+    Tortoise config for ``url`` as the default connection. PostgreSQL gets the pool size,
+    SQLite the pragmas (every SQLite credential is applied as ``PRAGMA key=value``);
+    options given in the URL query take precedence.
+    """
+    connection = expand_db_url(url)
+    if connection["engine"] == "tortoise.backends.sqlite":
+        for pragma, value in (sqlite_pragmas or {}).items():
+            connection["credentials"].setdefault(pragma, value)
+    else:
+        connection["credentials"].setdefault("minsize", pool_min)
+        connection["credentials"].setdefault("maxsize", pool_max)
 
-async def initialize_database() -> None:
+    return {
+        "connections": {"default": connection, **extra_connections},
+        "apps": {"models": {"models": MODELS, "default_connection": "default"}},
+        "timezone": "UTC",
+    }
+
+
+async def initialize_database(database: Config.Database = Config.Database()) -> None:
     try:
-        await Tortoise.init(
-            db_url="sqlite://database/database.sqlite3",
-            modules={"models": ["database.models.accounts"]},
-            timezone="UTC",
-        )
+        await Tortoise.init(config=build_tortoise_config(
+            database.url, database.pool_min, database.pool_max, sqlite_pragmas=database.sqlite.model_dump()
+        ))
+        write_queue.configure(enabled=database.write_queue, batch_size=database.write_batch_size)
 
         await Tortoise.generate_schemas(safe=True)
+        await apply_migrations()
 
     except Exception as error:
         logger.error(f"Error while initializing database: {error}")
         exit(0)
+
+
+async def close_database() -> None:
+    await write_queue.close()
+    # The SQLite driver runs a non-daemon thread per connection that keeps the process alive
+    await Tortoise.close_connections()
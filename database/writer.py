@@ -0,0 +1,134 @@
+import asyncio
+import contextvars
+from functools import wraps
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from loguru import logger
+from tortoise.exceptions import OperationalError
+from tortoise.transactions import in_transaction
+
+from utils.tracing import tracer
+
+
+Operation = Callable[[], Awaitable[Any]]
+
+
+class WriteQueue:
+    """
+    Funnels database mutations through one writer task.
+
+    Callers await their own result as before, but operations are executed by a single
+    coroutine that takes everything queued so far (up to ``batch_size``) and runs it in one
+    transaction. Writes never compete for the SQLite lock and thousands of small updates
+    share a commit instead of paying one each. When a batch fails it is retried operation
+    by operation, so an error only reaches the caller whose operation caused it.
+    """
+
+    LOCK_RETRIES = 5
+
+    def __init__(self, enabled: bool = True, batch_size: int = 500):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self._pending: List[Tuple[Operation, asyncio.Future]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executing = False
+        self._in_writer = contextvars.ContextVar("in_writer", default=False)
+
+    def configure(self, enabled: bool, batch_size: int) -> None:
+        self.enabled = enabled
+        self.batch_size = batch_size
+
+    def mutation(self, func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        """Decorator, routes the coroutine function through the queue"""
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await self.submit(lambda: func(*args, **kwargs))
+        return wrapper
+
+    async def submit(self, operation: Operation) -> Any:
+        # Mutations calling other mutations run inline, the writer can't wait for itself
+        if not self.enabled or self._in_writer.get():
+            return await operation()
+
+        self._ensure_writer()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((operation, future))
+        self._wakeup.set()
+        return await future
+
+    def _ensure_writer(self) -> None:
+        if self._task is not None and not self._task.done() and self._task.get_loop() is asyncio.get_running_loop():
+            return
+
+        self._wakeup = asyncio.Event()
+        # The writer keeps the caller's context (the ORM tracks its state in a context
+        # variable) but not the caller's trace span
+        context = contextvars.copy_context()
+        context.run(tracer.detach)
+        self._task = asyncio.create_task(self._run(), context=context)
+
+    async def _run(self) -> None:
+        self._in_writer.set(True)
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            while self._pending:
+                batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+                self._executing = True
+                try:
+                    await self._execute(batch)
+                finally:
+                    self._executing = False
+
+    async def _execute(self, batch: List[Tuple[Operation, asyncio.Future]]) -> None:
+        if len(batch) > 1:
+            try:
+                results = await self._run_in_transaction([operation for operation, _ in batch])
+            except Exception as error:
+                logger.debug(f"Write batch of {len(batch)} failed, retrying one by one: {error}")
+            else:
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+                return
+
+        # Single statements autocommit and wait for busy_timeout, no transaction needed
+        for operation, future in batch:
+            try:
+                result = await operation()
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+    async def _run_in_transaction(self, operations: List[Operation]) -> List[Any]:
+        for attempt in range(self.LOCK_RETRIES):
+            try:
+                results = []
+                async with in_transaction():
+                    for operation in operations:
+                        results.append(await operation())
+                return results
+            except OperationalError as error:
+                # In WAL mode a transaction that has read can't start writing after another
+                # connection committed; SQLite fails it at once instead of waiting for busy_timeout
+                if "locked" not in str(error) or attempt == self.LOCK_RETRIES - 1:
+                    raise
+                await asyncio.sleep(0.01 * 2 ** attempt)
+
+    async def close(self) -> None:
+        """Finishes the queued writes and stops the writer"""
+        while (self._pending or self._executing) and self._task is not None and not self._task.done():
+            await asyncio.sleep(0.01)
+
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+write_queue = WriteQueue()
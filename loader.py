@@ -1,7 +1,68 @@
-import asyncio
-
-from utils import load_config, FileOperations
+from utils import load_config, FileOperations, LoopMonitor, AdaptiveLimiter, ProxyHealthTracker, Pacer, TTLCache, metrics, error_aggregator, tracer, JsonlSpanExporter, cassette, connection_pool
+from loguru import logger
 
 config = load_config()
 file_operations = FileOperations()
-semaphore = asyncio.Semaphore(config.threads)
+semaphore = AdaptiveLimiter(
+    config.threads,
+    metrics,
+    adaptive=config.adaptive_concurrency.enabled,
+    min_limit=config.adaptive_concurrency.min_threads,
+    max_limit=config.adaptive_concurrency.max_threads,
+    adjust_interval=config.adaptive_concurrency.adjust_interval,
+    target_latency=config.adaptive_concurrency.target_latency,
+    max_error_rate=config.adaptive_concurrency.max_error_rate,
+    max_loop_lag=config.adaptive_concurrency.max_loop_lag,
+)
+loop_monitor = LoopMonitor(
+    metrics,
+    interval=config.monitoring.loop_lag_interval,
+    slow_callback_threshold=config.monitoring.slow_callback_threshold,
+    # The concurrency controller judges loop lag per adjust window
+    on_lag=semaphore.observe_loop_lag,
+)
+node_latency_cache = TTLCache(ttl=config.latency_probe.cache_ttl)
+error_aggregator.configure(
+    summary_interval=config.error_reporting.summary_interval,
+    traceback_sample_rate=config.error_reporting.traceback_sample_rate,
+)
+tracer.configure(
+    enabled=config.tracing.enabled,
+    sample_rate=config.tracing.sample_rate,
+    slow_threshold=config.tracing.slow_threshold,
+    flush_interval=config.tracing.flush_interval,
+    exporter=JsonlSpanExporter(
+        config.tracing.path,
+        max_bytes=int(config.tracing.max_file_size_mb * 1024 * 1024),
+        backup_count=config.tracing.backup_count,
+    ),
+)
+try:
+    cassette.configure(
+        mode=config.cassette.mode,
+        path=config.cassette.path,
+        preserve_latency=config.cassette.preserve_latency,
+        flush_interval=config.cassette.flush_interval,
+    )
+except (OSError, ValueError) as error:
+    logger.error(f"Failed to load cassette {config.cassette.path}: {error}")
+    raise SystemExit(1)
+connection_pool.configure(
+    enabled=config.connection_sharing.enabled,
+    idle_timeout=config.connection_sharing.idle_timeout,
+)
+proxy_health = ProxyHealthTracker(
+    metrics,
+    enabled=config.proxy_health.enabled,
+    failure_threshold=config.proxy_health.failure_threshold,
+    min_success_rate=config.proxy_health.min_success_rate,
+    check_interval=config.proxy_health.check_interval,
+    check_timeout=config.proxy_health.check_timeout,
+    report_interval=config.proxy_health.report_interval,
+)
+pacer = Pacer(
+    metrics,
+    enabled=config.pacing.enabled,
+    min_gap_ratio=config.pacing.min_gap_ratio,
+    report_interval=config.pacing.report_interval,
+)
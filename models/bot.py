@@ -15,3 +15,11 @@ class StatisticData(TypedDict):
     points: int
     referral_url: str
     status: bool
+
+
+class ProbeResult(TypedDict):
+    host: str
+    connect_ms: float
+    first_byte_ms: float
+    samples: list[float]
+    status: bool
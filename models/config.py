@@ -23,12 +23,140 @@ class Config(BaseModel):
         min: int
         max: int
 
+    class Monitoring(BaseModel):
+        loop_lag_interval: float = 0.5
+        slow_callback_threshold: float = 0.1
+        metrics_export_interval: float = 30
+
+    class Deadlines(BaseModel):
+        pass_timeout: float = 120
+        phase_timeouts: dict[str, float] = {
+            "prepare": 45,
+            "nodes": 30,
+            "ping": 60,
+            "sleep": 15,
+            "heartbeat": 60,
+            "points": 30,
+        }
+        backoff_base: float = 30
+        backoff_max: float = 1800
+
+    class Quarantine(BaseModel):
+        backoff_base: float = 300
+        backoff_max: float = 86400
+        report_interval: float = 600
+
+    class ProxyHealth(BaseModel):
+        enabled: bool = True
+        failure_threshold: PositiveInt = 5
+        min_success_rate: float = Field(default=0.3, ge=0, le=1)
+        check_interval: float = 60
+        check_timeout: float = 5
+        report_interval: float = 300
+
+    class Pacing(BaseModel):
+        enabled: bool = True
+        min_gap_ratio: float = Field(default=0.5, ge=0, le=1)
+        report_interval: float = 300
+
+    class Leases(BaseModel):
+        enabled: bool = False
+        ttl: float = 60
+        renew_interval: float = 20
+        batch_size: PositiveInt = 500
+
+    class Dashboard(BaseModel):
+        enabled: bool = False
+        refresh_interval: float = Field(default=1, gt=0)
+        rate_window: float = Field(default=10, gt=0)
+        log_level: Literal["TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL"] = "WARNING"
+
+    class WarmRestart(BaseModel):
+        enabled: bool = True
+        path: str = "results/state/snapshot.json"
+        max_age: float = 900
+        drain_timeout: float = 60
+
+    class HotReload(BaseModel):
+        enabled: bool = True
+        interval: float = 5
+
+    class ErrorReporting(BaseModel):
+        summary_interval: float = 60
+        traceback_sample_rate: float = Field(default=0.01, ge=0, le=1)
+
+    class Database(BaseModel):
+        class SQLite(BaseModel):
+            journal_mode: Literal["WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"] = "WAL"
+            synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+            cache_size: int = -65536
+            mmap_size: int = Field(default=268435456, ge=0)
+            busy_timeout: int = Field(default=5000, ge=0)
+
+        url: str = "sqlite://database/database.sqlite3"
+        pool_min: PositiveInt = 1
+        pool_max: PositiveInt = 10
+        sqlite: SQLite = SQLite()
+        write_queue: bool = True
+        write_batch_size: PositiveInt = 500
+
+    class Tracing(BaseModel):
+        enabled: bool = False
+        sample_rate: float = Field(default=0.01, ge=0, le=1)
+        slow_threshold: float = 30
+        path: str = "results/traces/spans.jsonl"
+        max_file_size_mb: float = 50
+        backup_count: int = Field(default=5, ge=0)
+        flush_interval: float = 5
+
+    class Cassette(BaseModel):
+        mode: Literal["disabled", "record", "replay"] = "disabled"
+        path: str = "results/cassettes/traffic.jsonl.gz"
+        preserve_latency: bool = True
+        flush_interval: float = 5
+
+    class ConnectionSharing(BaseModel):
+        enabled: bool = False
+        idle_timeout: float = 60
+
+    class AdaptiveConcurrency(BaseModel):
+        enabled: bool = False
+        min_threads: PositiveInt = 1
+        max_threads: PositiveInt = 200
+        adjust_interval: float = 10
+        target_latency: float = 5
+        max_error_rate: float = 0.1
+        max_loop_lag: float = 0.2
+
+    class LatencyProbe(BaseModel):
+        samples: PositiveInt = 3
+        timeout: float = 5
+        probe_all_nodes: bool = False
+        concurrency: PositiveInt = 5
+        cache_ttl: float = 60
+
     accounts_to_register: list[Account] = []
     accounts_to_farm: list[Account] = []
     referral_codes: list[str] = []
 
     delay_before_start: DelayBeforeStart
     show_points_stats: bool
+    database: Database = Database()
+    leases: Leases = Leases()
+    monitoring: Monitoring = Monitoring()
+    dashboard: Dashboard = Dashboard()
+    error_reporting: ErrorReporting = ErrorReporting()
+    tracing: Tracing = Tracing()
+    cassette: Cassette = Cassette()
+    connection_sharing: ConnectionSharing = ConnectionSharing()
+    deadlines: Deadlines = Deadlines()
+    quarantine: Quarantine = Quarantine()
+    proxy_health: ProxyHealth = ProxyHealth()
+    pacing: Pacing = Pacing()
+    hot_reload: HotReload = HotReload()
+    warm_restart: WarmRestart = WarmRestart()
+    latency_probe: LatencyProbe = LatencyProbe()
+    adaptive_concurrency: AdaptiveConcurrency = AdaptiveConcurrency()
 
     keepalive_interval: float
     heartbeat_interval: float
@@ -1,41 +1,48 @@
+import argparse
 import asyncio
 import random
+import signal
 import sys
-from typing import Callable, Coroutine, Any, List, Set
+from pathlib import Path
+from typing import Callable, Coroutine, Any, List, Set, Optional
 
 from loguru import logger
-from loader import config, semaphore, file_operations
+from loader import config, semaphore, file_operations, loop_monitor, proxy_health, pacer
 from core.bot import Bot
+from core.scheduler import FarmScheduler
+from core.reloader import ConfigReloader
+from core.leases import LeaseManager
+from core.snapshot import StateSnapshot
 from models import Account
-from console import Console
-from database import initialize_database
+from console import Console, FleetDashboard
+from utils import AsyncProfiler, metrics, error_aggregator, tracer, cassette, connection_pool
+from database import initialize_database, close_database, Accounts
 
 
-accounts_with_initial_delay: Set[str] = set()
+background_tasks: Set[asyncio.Task] = set()
+scheduler = FarmScheduler()
+lease_manager = LeaseManager(scheduler)
+reloader = ConfigReloader(scheduler, lease_manager)
+state_snapshot = StateSnapshot(scheduler, config.warm_restart.path, max_age=config.warm_restart.max_age)
+shutdown_task: Optional[asyncio.Task] = None
+farming_stopped = False
+SHUTDOWN_SIGNALS = (signal.SIGINT, signal.SIGTERM)
 
 
 async def run_module_safe(
         account: Account, process_func: Callable[[Bot], Coroutine[Any, Any, Any]]
 ) -> Any:
-    global accounts_with_initial_delay
-
     async with semaphore:
         bot = Bot(account)
         if config.delay_before_start.min > 0:
-            if process_func == process_farming and account.email not in accounts_with_initial_delay:
-                random_delay = random.randint(config.delay_before_start.min, config.delay_before_start.max)
-                logger.info(f"账户: {account.email} | 开始挂机，等待: {random_delay} 秒")
-                await asyncio.sleep(random_delay)
-                accounts_with_initial_delay.add(account.email)
-
-            elif process_func != process_farming:
-                random_delay = random.randint(config.delay_before_start.min, config.delay_before_start.max)
-                logger.info(f"账户: {account.email} | 睡眠 {random_delay} 秒")
-                await asyncio.sleep(random_delay)
+            random_delay = random.randint(config.delay_before_start.min, config.delay_before_start.max)
+            logger.info(f"账户: {account.email} | 睡眠 {random_delay} 秒")
+            await asyncio.sleep(random_delay)
 
-
-        result = await process_func(bot)
-        return result
+        try:
+            return await process_func(bot)
+        finally:
+            await bot.close()
 
 
 async def process_registration(bot: Bot) -> None:
@@ -43,10 +50,6 @@ async def process_registration(bot: Bot) -> None:
     await file_operations.export_result(operation_result, "register")
 
 
-async def process_farming(bot: Bot) -> None:
-    await bot.process_farming_actions()
-
-
 async def process_export_stats(bot: Bot) -> None:
     statistics_data = await bot.process_export_stats()
     await file_operations.export_stats(statistics_data)
@@ -59,22 +62,162 @@ async def run_module(
     return await asyncio.gather(*tasks)
 
 
-async def farm_continuously(accounts: List[Account]) -> None:
+async def report_quarantine_periodically() -> None:
     while True:
-        random.shuffle(accounts)
-        await run_module(accounts, process_farming)
-        await asyncio.sleep(10)
+        quarantined_accounts = await Accounts.get_quarantined_accounts()
+        await file_operations.export_quarantine_report(quarantined_accounts)
+
+        disabled = sum(1 for account in quarantined_accounts if account.disabled)
+        metrics.set_gauge("quarantine.accounts", len(quarantined_accounts) - disabled)
+        metrics.set_gauge("quarantine.disabled_accounts", disabled)
+        if quarantined_accounts:
+            logger.warning(f"隔离账户: {len(quarantined_accounts) - disabled} | 禁用账户: {disabled}")
+
+        await asyncio.sleep(config.quarantine.report_interval)
+
+
+async def flush_outputs() -> None:
+    await tracer.exporter.flush()
+    await cassette.flush()
+    await metrics.export(Path("./results/metrics.json"))
+
+
+async def shutdown_gracefully(main_task: asyncio.Task) -> None:
+    logger.info("Shutdown requested, finishing running passes...")
+    await scheduler.drain(config.warm_restart.drain_timeout)
+
+    try:
+        if config.warm_restart.enabled:
+            state_snapshot.save()
+        await flush_outputs()
+    except OSError as error:
+        logger.error(f"Failed to save state on shutdown: {error}")
+
+    # The drained scheduler returns by itself; the lease loop (or anything else still running) doesn't
+    if not farming_stopped:
+        main_task.cancel()
+
 
+def install_signal_handlers() -> None:
+    loop = asyncio.get_running_loop()
+    main_task = asyncio.current_task()
 
-def reset_initial_delays():
-    global accounts_with_initial_delay
-    accounts_with_initial_delay.clear()
+    def request_shutdown() -> None:
+        global shutdown_task
+        if shutdown_task is None:
+            shutdown_task = asyncio.create_task(shutdown_gracefully(main_task))
+        else:
+            logger.warning("Second shutdown signal, exiting without waiting for running passes")
+            main_task.cancel()
+
+    for signal_number in SHUTDOWN_SIGNALS:
+        try:
+            loop.add_signal_handler(signal_number, request_shutdown)
+        except NotImplementedError:
+            # Not available on Windows event loops, Ctrl+C stops the bot immediately there
+            return
+
+
+def remove_signal_handlers() -> None:
+    loop = asyncio.get_running_loop()
+    for signal_number in SHUTDOWN_SIGNALS:
+        try:
+            loop.remove_signal_handler(signal_number)
+        except NotImplementedError:
+            return
+
+
+async def farm_continuously(accounts: List[Account], passes: Optional[int] = None, back_to_back: bool = False) -> None:
+    global farming_stopped
+    farming_stopped = False
+    install_signal_handlers()
+    report_task = asyncio.create_task(report_quarantine_periodically())
+    dashboard_task = None
+    if config.dashboard.enabled:
+        dashboard = FleetDashboard(
+            scheduler,
+            metrics,
+            refresh_interval=config.dashboard.refresh_interval,
+            rate_window=config.dashboard.rate_window,
+            log_level=config.dashboard.log_level,
+        )
+        dashboard_task = asyncio.create_task(dashboard.run())
+
+    if passes is None:
+        emails = {account.email for account in accounts}
+        wake_times = await Accounts.get_wake_times()
+        seeded = scheduler.seed_wake_times({email: wake_at for email, wake_at in wake_times.items() if email in emails})
+        if seeded:
+            logger.info(f"Seeded due times of {seeded} accounts from the database")
+
+    try:
+        if config.leases.enabled and passes is None:
+            await lease_manager.run(accounts)
+        else:
+            await scheduler.run(accounts, passes=passes, back_to_back=back_to_back)
+    finally:
+        farming_stopped = True
+        report_task.cancel()
+        if dashboard_task is not None:
+            dashboard_task.cancel()
+        remove_signal_handlers()
 
 
-async def run() -> None:
-    await initialize_database()
+async def profile_farming(accounts: List[Account], passes: int) -> None:
+    profiler = AsyncProfiler()
+    logger.info(f"Profiling {passes} farming passes for {len(accounts)} accounts...")
+
+    profiler.start()
+    try:
+        # Passes run one after another, waiting for start delays and due times would only sample an idle loop
+        await farm_continuously(accounts, passes=passes, back_to_back=True)
+    finally:
+        profiler.stop()
+        profiler.export()
+        await cassette.flush()
+
+
+def start_monitoring() -> None:
+    """Background tasks for farming; started once, the farm module can be picked again from the menu"""
+    if background_tasks:
+        return
+
+    loop_monitor.start()
+    background_tasks.add(asyncio.create_task(
+        metrics.export_periodically(Path("./results/metrics.json"), config.monitoring.metrics_export_interval)
+    ))
+    background_tasks.add(asyncio.create_task(semaphore.run_controller()))
+    background_tasks.add(asyncio.create_task(error_aggregator.report_periodically()))
+    background_tasks.add(asyncio.create_task(proxy_health.run_checks()))
+    background_tasks.add(asyncio.create_task(proxy_health.report_periodically()))
+    background_tasks.add(asyncio.create_task(pacer.report_periodically()))
+    background_tasks.add(asyncio.create_task(reloader.watch()))
+    background_tasks.add(asyncio.create_task(tracer.export_periodically()))
+    background_tasks.add(asyncio.create_task(cassette.record_periodically()))
+
+
+async def run(profile_passes: Optional[int] = None) -> None:
+    await initialize_database(config.database)
+    try:
+        await run_modules(profile_passes)
+    finally:
+        await connection_pool.close()
+        await close_database()
+
+
+async def run_modules(profile_passes: Optional[int] = None) -> None:
+    if config.warm_restart.enabled and not profile_passes:
+        state_snapshot.restore()
     await file_operations.setup_files()
-    reset_initial_delays()
+
+    if profile_passes:
+        if not config.accounts_to_farm:
+            logger.error("No accounts for farm")
+            return
+
+        start_monitoring()
+        await profile_farming(config.accounts_to_farm, profile_passes)
+        return
 
     module_map = {
         "register": (config.accounts_to_register, process_registration),
@@ -97,18 +240,35 @@ async def run() -> None:
             continue
 
         if config.module == "farm":
+            start_monitoring()
             await process_func(accounts)
+            if shutdown_task is not None:
+                # Drained by a shutdown signal: wait for the snapshot and exit instead of showing the menu again
+                await shutdown_task
+                return
         else:
             await run_module(accounts, process_func)
             input("\n\nPress Enter to continue...")
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Pipe Network Bot")
+    parser.add_argument("--profile", action="store_true", help="Profile a fixed number of farming passes and exit")
+    parser.add_argument("--profile-passes", type=int, default=3, help="Number of farming passes to profile (default: 3)")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
+
     try:
         if sys.platform == "win32":
             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-        asyncio.run(run())
+        asyncio.run(run(profile_passes=args.profile_passes if args.profile else None))
+
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        logger.info("Stopped")
 
     except Exception as error:
         logger.error(f"An error occurred: {error}")
@@ -1,5 +1,18 @@
-from .load_config import load_config
+from .load_config import load_config, ConfigLoader, ConfigurationError
 from .console import *
 from .file_utils import *
 from .api_utils import *
-from .handlers import error_handler
+from .handlers import error_handler, error_aggregator
+from .profiler import AsyncProfiler
+from .clock import clock, Clock, VirtualClock, VirtualTimeEventLoop
+from .metrics import metrics, MetricsRegistry
+from .tracing import tracer, Tracer, Span, JsonlSpanExporter
+from .cassette import cassette, Cassette, CassetteError, CassetteResponse
+from .connection_pool import connection_pool, ConnectionPool, SharedConnectionSession
+from .loop_monitor import LoopMonitor
+from .cache import TTLCache
+from .concurrency import AdaptiveLimiter
+from .pipeline import Pipeline
+from .proxy_health import ProxyHealthTracker
+from .pacing import Pacer
+from .config_watcher import ConfigWatcher
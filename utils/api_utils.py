@@ -1,3 +1,7 @@
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Optional
 from urllib.parse import urlparse, parse_qs
 
 
@@ -5,3 +9,13 @@ def url_to_params_dict(url: str) -> dict:
     parsed = urlparse(url)
     params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
     return params
+
+
+def token_expires_at(token: str) -> Optional[datetime]:
+    """Reads the ``exp`` claim of a JWT without verifying it, None for opaque tokens"""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return datetime.fromtimestamp(int(claims["exp"]), tz=timezone.utc)
+    except (IndexError, ValueError, KeyError, TypeError):
+        return None
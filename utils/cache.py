@@ -0,0 +1,107 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class _ComputationCancelled(Exception):
+    """Set on a pending lookup whose computing coroutine was cancelled"""
+
+    pass
+
+
+class TTLCache:
+    """
+    In-memory cache with per-entry expiry.
+
+    ``get_or_compute`` coalesces concurrent lookups of the same key, so only one
+    coroutine computes a missing value while the others wait for its result. If that
+    coroutine is cancelled, the waiters compute the value themselves instead of being
+    cancelled with it.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 100_000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if len(self._entries) >= self.max_size:
+            self.purge()
+            if len(self._entries) >= self.max_size:
+                self._entries.pop(next(iter(self._entries)))
+
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+
+    def snapshot(self) -> List[Tuple[Hashable, Any, float]]:
+        """Live entries as ``(key, value, remaining ttl)``"""
+        now = time.monotonic()
+        return [(key, value, expires_at - now) for key, (expires_at, value) in self._entries.items() if expires_at > now]
+
+    def restore(self, entries: Iterable[Tuple[Hashable, Any, float]]) -> None:
+        for key, value, remaining in entries:
+            if remaining > 0:
+                self.set(key, value, ttl=remaining)
+
+    def purge(self) -> None:
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at < now]:
+            del self._entries[key]
+
+    async def get_or_compute(
+            self,
+            key: Hashable,
+            factory: Callable[[], Awaitable[Any]],
+            cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Cached value of ``key``, computed by ``factory`` when missing. Results rejected by
+        ``cacheable`` (failures, for example) are handed to concurrent waiters but not stored.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        if key in self._pending:
+            try:
+                return await asyncio.shield(self._pending[key])
+            except _ComputationCancelled:
+                return await self.get_or_compute(key, factory, cacheable)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await factory()
+        except asyncio.CancelledError:
+            # Only the computing coroutine was cancelled, the waiters retry on their own
+            future.set_exception(_ComputationCancelled())
+            future.exception()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            # Mark as retrieved, waiters (if any) get the exception themselves
+            future.exception()
+            raise
+        finally:
+            self._pending.pop(key, None)
+
+        if self.ttl > 0 and (cacheable is None or cacheable(value)):
+            self.set(key, value)
+
+        future.set_result(value)
+        return value
@@ -0,0 +1,154 @@
+import asyncio
+import gzip
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiofiles
+from loguru import logger
+
+
+class CassetteError(Exception):
+    """Raised on replay for recorded network errors and for requests missing from the cassette"""
+
+    pass
+
+
+class CassetteResponse:
+    """Replayed response, implements the part of ``curl_cffi.requests.Response`` the API client uses"""
+
+    __slots__ = ("status_code", "text", "url")
+
+    def __init__(self, status_code: int, text: str, url: str):
+        self.status_code = status_code
+        self.text = text
+        self.url = url
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+class Cassette:
+    """
+    Records HTTP exchanges of the API client and serves them back offline.
+
+    In ``record`` mode every response (or network error) is stored with its latency and
+    appended to a gzip-compressed JSONL file, one entry per line. In ``replay`` mode
+    requests are answered from that file: exchanges are matched by method, host and path
+    (bodies and query strings carry per-account data) and served in recorded order,
+    wrapping around once exhausted. With ``preserve_latency`` each replayed exchange
+    waits for its recorded latency, so runs see the original latency distribution.
+    """
+
+    def __init__(self):
+        self.mode: Literal["disabled", "record", "replay"] = "disabled"
+        self.path: Optional[Path] = None
+        self.preserve_latency = True
+        self.flush_interval = 5.0
+        self._buffer: List[str] = []
+        self._exchanges: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._positions: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._missing: set[Tuple[str, str]] = set()
+
+    def configure(
+            self,
+            mode: Literal["disabled", "record", "replay"],
+            path: Path,
+            preserve_latency: bool = True,
+            flush_interval: float = 5.0,
+    ) -> None:
+        self.mode = mode
+        self.path = Path(path)
+        self.preserve_latency = preserve_latency
+        self.flush_interval = flush_interval
+
+        if mode == "replay":
+            self.load()
+
+    @staticmethod
+    def _key(method: str, url: str) -> Tuple[str, str]:
+        parsed = urlparse(url)
+        return method.upper(), f"{parsed.netloc}{parsed.path}"
+
+    def load(self) -> None:
+        self._exchanges.clear()
+        self._positions.clear()
+        with gzip.open(self.path, "rt", encoding="utf-8") as file:
+            for line in file:
+                exchange = json.loads(line)
+                if "m" in exchange:
+                    self._exchanges.setdefault((exchange["m"], exchange["u"]), []).append(exchange)
+
+        logger.info(f"Replaying {sum(map(len, self._exchanges.values()))} HTTP exchanges from {self.path}")
+
+    async def call(self, method: str, url: str, request: Callable[[], Awaitable[Any]]) -> Any:
+        """Sends the request through ``request()``, recording or replacing it depending on the mode"""
+        if self.mode == "replay":
+            return await self._replay(method, url)
+        if self.mode != "record":
+            return await request()
+
+        started = time.perf_counter()
+        try:
+            response = await request()
+        except Exception as error:
+            self._record(method, url, time.perf_counter() - started, error=str(error))
+            raise
+
+        self._record(method, url, time.perf_counter() - started, status_code=response.status_code, text=response.text)
+        return response
+
+    def _record(self, method: str, url: str, latency: float, status_code: int = None, text: str = None, error: str = None) -> None:
+        method, target = self._key(method, url)
+        exchange: Dict[str, Any] = {"m": method, "u": target, "l": round(latency, 4)}
+        if error is not None:
+            exchange["e"] = error
+        else:
+            exchange["s"] = status_code
+            exchange["b"] = text
+
+        self._buffer.append(json.dumps(exchange, ensure_ascii=False, separators=(",", ":")))
+
+    async def _replay(self, method: str, url: str) -> CassetteResponse:
+        key = self._key(method, url)
+        exchanges = self._exchanges.get(key)
+        if not exchanges:
+            if key not in self._missing:
+                self._missing.add(key)
+                logger.warning(f"No recorded exchange for {key[0]} {key[1]}")
+            raise CassetteError(f"No recorded exchange for {key[0]} {key[1]}")
+
+        position = self._positions[key]
+        self._positions[key] = position + 1
+        exchange = exchanges[position % len(exchanges)]
+
+        if self.preserve_latency:
+            await asyncio.sleep(exchange["l"])
+        if "e" in exchange:
+            raise CassetteError(exchange["e"])
+
+        return CassetteResponse(exchange["s"], exchange["b"], url)
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+
+        lines, self._buffer = self._buffer, []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Every flush is a separate gzip member, readers decompress concatenated members as one stream
+        async with aiofiles.open(self.path, "ab") as file:
+            await file.write(gzip.compress(("\n".join(lines) + "\n").encode("utf-8")))
+
+    async def record_periodically(self) -> None:
+        while self.mode == "record":
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except OSError as error:
+                logger.error(f"Failed to write cassette: {error}")
+
+
+cassette = Cassette()
@@ -0,0 +1,81 @@
+import asyncio
+import selectors
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+
+class SystemClock:
+    @staticmethod
+    def now() -> datetime:
+        return datetime.now(pytz.UTC)
+
+    @staticmethod
+    def time() -> float:
+        return time.time()
+
+
+class VirtualClock:
+    """Clock that only moves when advanced, used by the simulation harness"""
+
+    def __init__(self, start: datetime = None):
+        self.start = start or datetime.now(pytz.UTC)
+        self.elapsed = 0.0
+
+    def advance(self, seconds: float) -> None:
+        self.elapsed += seconds
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=self.elapsed)
+
+    def time(self) -> float:
+        return self.start.timestamp() + self.elapsed
+
+
+class Clock:
+    """
+    Process-wide clock used for every scheduling decision.
+
+    Modules import the single ``clock`` instance, so swapping its source with ``use``
+    moves all of them to virtual time at once.
+    """
+
+    def __init__(self):
+        self.source = SystemClock()
+
+    def use(self, source) -> None:
+        self.source = source
+
+    def now(self) -> datetime:
+        return self.source.now()
+
+    def time(self) -> float:
+        return self.source.time()
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    def __init__(self, virtual_clock: VirtualClock):
+        super().__init__()
+        self.virtual_clock = virtual_clock
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        # Nothing to do until the next timer: jump straight to it instead of waiting
+        if not events and timeout:
+            self.virtual_clock.advance(timeout)
+        return events
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """Event loop whose timers run on a VirtualClock, ``asyncio.sleep`` returns instantly in real time"""
+
+    def __init__(self, virtual_clock: VirtualClock):
+        self.virtual_clock = virtual_clock
+        super().__init__(selector=_VirtualSelector(virtual_clock))
+
+    def time(self) -> float:
+        return self.virtual_clock.elapsed
+
+
+clock = Clock()
@@ -0,0 +1,148 @@
+import asyncio
+from typing import List
+
+from loguru import logger
+
+from .metrics import MetricsRegistry
+
+
+class AdaptiveLimiter:
+    """
+    Semaphore whose limit can change at runtime.
+
+    When ``adaptive`` is enabled, ``run_controller`` applies AIMD: every ``adjust_interval``
+    seconds the limit is multiplied by ``decrease_factor`` if the window showed congestion
+    (error rate, p90 request latency or event loop lag above target), otherwise it grows by
+    ``increase_step`` as long as workers were waiting for a free slot.
+    """
+
+    def __init__(
+            self,
+            limit: int,
+            metrics: MetricsRegistry,
+            adaptive: bool = False,
+            min_limit: int = 1,
+            max_limit: int = 200,
+            adjust_interval: float = 10,
+            target_latency: float = 5,
+            max_error_rate: float = 0.1,
+            max_loop_lag: float = 0.2,
+            increase_step: int = 1,
+            decrease_factor: float = 0.7,
+            min_samples: int = 10,
+    ):
+        self.metrics = metrics
+        self.adaptive = adaptive
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limit = min(max(limit, self.min_limit), self.max_limit) if adaptive else limit
+
+        self.adjust_interval = adjust_interval
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+        self.max_loop_lag = max_loop_lag
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.min_samples = min_samples
+
+        self.active = 0
+        self.waiting = 0
+        self._condition = asyncio.Condition()
+        self._window_latencies: List[float] = []
+        self._window_errors = 0
+        self._window_lags: List[float] = []
+        self._window_saturated = False
+        self._publish()
+
+    async def __aenter__(self) -> "AdaptiveLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.release()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            if self.active >= self.limit:
+                self._window_saturated = True
+                self.waiting += 1
+                try:
+                    await self._condition.wait_for(lambda: self.active < self.limit)
+                finally:
+                    self.waiting -= 1
+
+            self.active += 1
+            self._publish()
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.active -= 1
+            self._condition.notify()
+            self._publish()
+
+    async def set_limit(self, limit: int) -> None:
+        async with self._condition:
+            self.limit = max(limit, 1)
+            self._condition.notify(max(self.limit - self.active, 0))
+            self._publish()
+
+    def observe(self, latency: float, error: bool = False) -> None:
+        """Records one request outcome, latency in seconds"""
+        if not self.adaptive:
+            # Nothing drains the window without the controller
+            return
+
+        self._window_latencies.append(latency)
+        if error:
+            self._window_errors += 1
+
+    def observe_loop_lag(self, lag: float) -> None:
+        """Records one event loop lag measurement, in seconds"""
+        if self.adaptive:
+            self._window_lags.append(lag)
+
+    def _publish(self) -> None:
+        self.metrics.set_gauge("concurrency.limit", self.limit)
+        self.metrics.set_gauge("concurrency.active", self.active)
+        self.metrics.set_gauge("concurrency.waiting", self.waiting)
+
+    def _next_limit(self) -> tuple[int, str]:
+        latencies, errors, saturated = self._window_latencies, self._window_errors, self._window_saturated or self.waiting > 0
+        lags = self._window_lags
+        self._window_latencies, self._window_errors, self._window_lags, self._window_saturated = [], 0, [], False
+
+        loop_lag = sorted(lags)[int(0.9 * (len(lags) - 1))] if lags else 0.0
+        if loop_lag > self.max_loop_lag:
+            return max(self.min_limit, int(self.limit * self.decrease_factor)), f"loop lag p90 {loop_lag * 1000:.0f}ms"
+
+        if len(latencies) < self.min_samples:
+            return self.limit, "not enough samples"
+
+        error_rate = errors / len(latencies)
+        latency_p90 = sorted(latencies)[int(0.9 * (len(latencies) - 1))]
+        self.metrics.set_gauge("concurrency.window_error_rate", error_rate)
+        self.metrics.set_gauge("concurrency.window_latency_p90", latency_p90)
+
+        if error_rate > self.max_error_rate:
+            return max(self.min_limit, int(self.limit * self.decrease_factor)), f"error rate {error_rate:.1%}"
+        if latency_p90 > self.target_latency:
+            return max(self.min_limit, int(self.limit * self.decrease_factor)), f"latency p90 {latency_p90:.2f}s"
+        if saturated:
+            return min(self.max_limit, self.limit + self.increase_step), "all slots busy"
+
+        return self.limit, "steady"
+
+    async def run_controller(self) -> None:
+        if not self.adaptive:
+            return
+
+        while True:
+            await asyncio.sleep(self.adjust_interval)
+            new_limit, reason = self._next_limit()
+            if new_limit == self.limit:
+                continue
+
+            direction = "increase" if new_limit > self.limit else "decrease"
+            self.metrics.inc(f"concurrency.{direction}s")
+            logger.info(f"Concurrency limit {self.limit} -> {new_limit} ({reason})")
+            await self.set_limit(new_limit)
@@ -0,0 +1,43 @@
+import asyncio
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+
+class ConfigWatcher:
+    """Polls file modification times and calls back once a burst of changes has settled"""
+
+    def __init__(self, paths: List[Path], interval: float = 5, settle_delay: float = 1):
+        self.paths = paths
+        self.interval = interval
+        self.settle_delay = settle_delay
+
+    def _snapshot(self) -> Dict[Path, Optional[float]]:
+        snapshot = {}
+        for path in self.paths:
+            try:
+                snapshot[path] = path.stat().st_mtime
+            except OSError:
+                snapshot[path] = None
+        return snapshot
+
+    async def watch(self, on_change: Callable[[List[Path]], Awaitable[None]]) -> None:
+        previous = self._snapshot()
+
+        while True:
+            await asyncio.sleep(self.interval)
+            current = self._snapshot()
+            if current == previous:
+                continue
+
+            # Editors often write in several steps, wait until the files stop changing
+            await asyncio.sleep(self.settle_delay)
+            current = self._snapshot()
+            changed = [path for path in self.paths if current[path] != previous[path]]
+            previous = current
+
+            try:
+                await on_change(changed)
+            except Exception as error:
+                logger.error(f"Failed to apply changes from {', '.join(path.name for path in changed)}: {error}")
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+from curl_cffi import AsyncCurl, CurlOpt
+from curl_cffi.requests import AsyncSession
+
+from .metrics import metrics
+
+
+class _Egress:
+    __slots__ = ("acurl", "loop", "sessions", "last_used")
+
+    def __init__(self, acurl: AsyncCurl, loop: asyncio.AbstractEventLoop):
+        self.acurl = acurl
+        self.loop = loop
+        self.sessions = 0
+        self.last_used = time.monotonic()
+
+
+class SharedConnectionSession(AsyncSession):
+    """
+    Session whose connections belong to a shared curl multi handle.
+
+    Headers, cookies and curl handles stay per session; closing it gives the handles back
+    without closing the multi handle (``AsyncSession.close`` would close it for everyone).
+    """
+
+    def __init__(self, pool: "ConnectionPool", key: str, **kwargs):
+        super().__init__(**kwargs)
+        self._connection_pool = pool
+        self._egress_key = key
+
+    async def close(self) -> None:
+        if self._closed:
+            return
+
+        self._closed = True
+        while not self.pool.empty():
+            curl = self.pool.get_nowait()
+            if curl:
+                curl.close()
+        await self._connection_pool.release(self._egress_key)
+
+
+class ConnectionPool:
+    """
+    Shares connections between the sessions of accounts behind the same egress path.
+
+    Every account still gets its own session (headers, token and cookies are never
+    shared), but sessions with the same proxy, or no proxy, run on one curl multi handle
+    per egress path. libcurl keeps the connection cache in the multi handle, so a TLS
+    connection to the API opened by one account is reused by the next, and concurrent
+    requests are multiplexed as HTTP/2 streams over it instead of each opening its own
+    connection. An egress path without sessions is closed after ``idle_timeout`` seconds.
+    """
+
+    def __init__(self, enabled: bool = False, idle_timeout: float = 60.0):
+        self.enabled = enabled
+        self.idle_timeout = idle_timeout
+        self._egress: Dict[str, _Egress] = {}
+
+    def configure(self, enabled: bool, idle_timeout: float) -> None:
+        self.enabled = enabled
+        self.idle_timeout = idle_timeout
+
+    def session(self, proxies: Optional[Dict[str, str]] = None, **kwargs) -> AsyncSession:
+        """New session for one account, on the shared connections of its egress path when enabled"""
+        if not self.enabled:
+            return AsyncSession(proxies=proxies, **kwargs)
+
+        key = (proxies or {}).get("https", "direct")
+        loop = asyncio.get_running_loop()
+        egress = self._egress.get(key)
+        if egress is None or egress.loop is not loop:
+            egress = self._egress[key] = _Egress(AsyncCurl(loop=loop), loop)
+            metrics.inc("http.egress.opened")
+            metrics.set_gauge("http.egress.paths", len(self._egress))
+
+        egress.sessions += 1
+        # Wait for a connection being set up to confirm HTTP/2 instead of opening a parallel one
+        curl_options = {CurlOpt.PIPEWAIT: 1, **kwargs.pop("curl_options", {})}
+        return SharedConnectionSession(
+            self, key, async_curl=egress.acurl, proxies=proxies, curl_options=curl_options, **kwargs
+        )
+
+    async def release(self, key: str) -> None:
+        egress = self._egress.get(key)
+        if egress is None:
+            return
+
+        egress.sessions = max(egress.sessions - 1, 0)
+        egress.last_used = time.monotonic()
+        await self.close_idle()
+
+    async def close_idle(self) -> None:
+        cutoff = time.monotonic() - self.idle_timeout
+        idle = [key for key, egress in self._egress.items() if not egress.sessions and egress.last_used < cutoff]
+        for key in idle:
+            await self._close_egress(key)
+
+    async def _close_egress(self, key: str) -> None:
+        egress = self._egress.pop(key)
+        metrics.set_gauge("http.egress.paths", len(self._egress))
+        if egress.loop is asyncio.get_running_loop():
+            await egress.acurl.close()
+
+    async def close(self) -> None:
+        for key in list(self._egress):
+            await self._close_egress(key)
+
+
+connection_pool = ConnectionPool()
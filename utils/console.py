@@ -1,18 +1,38 @@
 import sys
+from typing import Any, Dict
+
 import urllib3
 
 from loguru import logger
 
 
+# Loguru's default stderr handler until setup() replaces it
+_console_handler: Dict[str, Any] = {"id": 0, "options": {"sink": sys.stderr}}
+
+
+def console_handler_options() -> Dict[str, Any]:
+    """Options the current console log handler was added with"""
+    return dict(_console_handler["options"])
+
+
+def set_console_handler(**options) -> None:
+    """Replaces the console log handler, other sinks are kept"""
+    try:
+        logger.remove(_console_handler["id"])
+    except ValueError:
+        # Already removed by a logger.remove() elsewhere
+        pass
+
+    _console_handler.update(id=logger.add(**options), options=options)
+
+
 def setup():
     urllib3.disable_warnings()
     logger.remove()
-    logger.add(
-        sys.stdout,
+    set_console_handler(
+        sink=sys.stdout,
         colorize=True,
         format="<light-cyan>{time:HH:mm:ss}</light-cyan> | <level> {level: <8}</level> | - <white>{"
         "message}</white>",
     )
     logger.add("./logs/logs.log", rotation="1 day", retention="7 days")
-
-
@@ -23,6 +23,9 @@ class FileOperations:
             "stats": {
                 "base": self.base_path / "accounts_stats.csv",
             },
+            "quarantine": {
+                "base": self.base_path / "quarantined_accounts.csv",
+            },
         }
 
     async def setup_files(self):
@@ -83,3 +86,25 @@ class FileOperations:
 
             except IOError as e:
                 print(f"Error writing to file: {e}")
+
+    async def export_quarantine_report(self, accounts: list) -> None:
+        file_path = self.module_paths["quarantine"]["base"]
+        async with self.lock:
+            try:
+                async with aiofiles.open(file_path, mode="w", newline="") as f:
+                    writer = AsyncWriter(f)
+                    await writer.writerow(["Email", "Failures", "Disabled", "Quarantined Until", "Last Error"])
+
+                    for account in accounts:
+                        await writer.writerow(
+                            [
+                                account.email,
+                                account.failure_count,
+                                account.disabled,
+                                account.quarantined_until or "",
+                                account.last_error or "",
+                            ]
+                        )
+
+            except IOError as e:
+                print(f"Error writing to file: {e}")
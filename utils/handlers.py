@@ -1,16 +1,89 @@
 import asyncio
+import random
+import re
+from collections import defaultdict
 from functools import wraps
 from json import JSONDecodeError
-from typing import TypeVar, Optional, Callable
+from typing import TypeVar, Optional, Callable, Dict
 
 from loguru import logger
 from models import OperationResult
 
 from core.exceptions.base import APIError
+from .metrics import metrics, MetricsRegistry
 
 T = TypeVar('T')
 
 
+class ErrorAggregator:
+    """
+    Groups exceptions by fingerprint (type, function, message template)
+
+    The first occurrence of a fingerprint is logged with a traceback, repeats only
+    with probability ``traceback_sample_rate``; everything else is counted and
+    reported in periodic summaries.
+    """
+
+    TEMPLATE_PATTERNS = (
+        (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "<email>"),
+        (re.compile(r"https?://\S+"), "<url>"),
+        (re.compile(r"\b[0-9a-fA-F]{8,}\b"), "<hex>"),
+        (re.compile(r"\d+(\.\d+)*"), "<n>"),
+    )
+
+    def __init__(self, registry: MetricsRegistry, summary_interval: float = 60, traceback_sample_rate: float = 0.01):
+        self.metrics = registry
+        self.summary_interval = summary_interval
+        self.traceback_sample_rate = traceback_sample_rate
+        self.counts: Dict[str, int] = defaultdict(int)
+        self._reported_counts: Dict[str, int] = {}
+
+    def configure(self, summary_interval: float, traceback_sample_rate: float) -> None:
+        self.summary_interval = summary_interval
+        self.traceback_sample_rate = traceback_sample_rate
+
+    @classmethod
+    def fingerprint(cls, error: BaseException, func_name: str) -> str:
+        template = str(error)[:200]
+        for pattern, replacement in cls.TEMPLATE_PATTERNS:
+            template = pattern.sub(replacement, template)
+
+        return f"{type(error).__name__} in {func_name}: {template}"
+
+    def count(self, error: BaseException, func_name: str) -> int:
+        key = self.fingerprint(error, func_name)
+        self.counts[key] += 1
+        self.metrics.inc(f"errors.{type(error).__name__}.{func_name}")
+        return self.counts[key]
+
+    def report(self, error: BaseException, func_name: str, message: str) -> None:
+        occurrence = self.count(error, func_name)
+
+        if occurrence == 1:
+            logger.opt(exception=error).error(message)
+        elif random.random() < self.traceback_sample_rate:
+            logger.opt(exception=error).error(f"{message} (sampled, seen {occurrence} times)")
+
+    def log_summary(self) -> None:
+        lines = []
+        for key, total in sorted(self.counts.items(), key=lambda item: -item[1]):
+            new = total - self._reported_counts.get(key, 0)
+            if new > 0:
+                lines.append(f"  +{new} (total {total}) | {key}")
+            self._reported_counts[key] = total
+
+        if lines:
+            logger.warning("Error summary for the last {:.0f}s:\n{}", self.summary_interval, "\n".join(lines))
+
+    async def report_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.summary_interval)
+            self.log_summary()
+
+
+error_aggregator = ErrorAggregator(metrics)
+
+
 def error_handler(*, return_operation_result: bool = False):
     """
     Декоратор для обработки ошибок асинхронных методов
@@ -25,23 +98,26 @@ def error_handler(*, return_operation_result: bool = False):
 
             except APIError as error:
                 self = args[0]
+                error_aggregator.count(error, func.__name__)
                 logger.error(f"账户: {self.account_data.email} | {func.__name__} 失败 (请求异常): {error}")
                 if hasattr(self, 'handle_api_error'):
                     await self.handle_api_error(error)
 
             except JSONDecodeError as error:
                 self = args[0]
+                error_aggregator.count(error, func.__name__)
                 logger.error(f"账户: {self.account_data.email} | {func.__name__} 失败 (JSON解析异常): {error}")
 
-            except asyncio.TimeoutError:
+            except asyncio.TimeoutError as error:
                 self = args[0]
+                error_aggregator.count(error, func.__name__)
                 logger.error(f"账户: {self.account_data.email} | {func.__name__} 超时")
                 if hasattr(self, 'handle_timeout'):
                     await self.handle_timeout()
 
             except Exception as error:
                 self = args[0]
-                logger.error(f"账户: {self.account_data.email} | {func.__name__} 失败 (异常): {error}", exc_info=True)
+                error_aggregator.report(error, func.__name__, f"账户: {self.account_data.email} | {func.__name__} 失败 (异常): {error}")
 
             if return_operation_result:
                 self = args[0]
@@ -54,4 +130,3 @@ def error_handler(*, return_operation_result: bool = False):
 
         return wrapper
     return decorator
-
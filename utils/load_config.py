@@ -99,7 +99,11 @@ class ConfigLoader:
         return accounts
 
 
-    def load(self) -> Config:
+    @property
+    def watched_files(self) -> List[Path]:
+        return [self.settings_path, self.data_path / "farm.txt", self.data_path / "proxies.txt"]
+
+    def load(self, exit_on_error: bool = True) -> Config:
         try:
             params = self._load_yaml()
             proxies = self._parse_proxies()
@@ -118,6 +122,8 @@ class ConfigLoader:
 
         except Exception as e:
             logger.error(f"Configuration loading failed: {e}")
+            if not exit_on_error:
+                raise ConfigurationError(str(e)) from e
             raise SystemExit(1)
 
 
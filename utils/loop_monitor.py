@@ -0,0 +1,91 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, Optional
+
+from loguru import logger
+
+from .metrics import MetricsRegistry
+
+
+class LoopMonitor:
+    """
+    Measures event loop lag and reports callbacks that block the loop.
+
+    A coroutine sleeps for ``interval`` and records how late it wakes up (``loop.lag_ms``).
+    A watchdog thread notices when that coroutine misses its wake-up by more than
+    ``slow_callback_threshold`` and logs the loop thread's stack while it is still blocked.
+    Every measurement (in seconds) is also passed to ``on_lag`` when given.
+    """
+
+    def __init__(
+            self,
+            metrics: MetricsRegistry,
+            interval: float = 0.5,
+            slow_callback_threshold: float = 0.1,
+            on_lag: Optional[Callable[[float], None]] = None,
+    ):
+        self.metrics = metrics
+        self.interval = interval
+        self.slow_callback_threshold = slow_callback_threshold
+        self.on_lag = on_lag
+
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._loop_thread_ident: Optional[int] = None
+        self._last_beat = time.monotonic()
+        self._beats = 0
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self._loop_thread_ident = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop_event.clear()
+
+        self._task = asyncio.get_running_loop().create_task(self._measure_lag())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        if self._watchdog is not None:
+            self._stop_event.set()
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _measure_lag(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - started - self.interval, 0.0)
+
+            self.metrics.observe("loop.lag_ms", lag * 1000)
+            self.metrics.set_gauge("loop.lag_ms.last", lag * 1000)
+            if self.on_lag is not None:
+                self.on_lag(lag)
+            self._last_beat = time.monotonic()
+            self._beats += 1
+
+    def _watch(self) -> None:
+        reported_beat = -1
+        check_interval = max(self.slow_callback_threshold / 2, 0.01)
+
+        while not self._stop_event.wait(check_interval):
+            blocked_for = time.monotonic() - self._last_beat - self.interval
+            if blocked_for < self.slow_callback_threshold or reported_beat == self._beats:
+                continue
+
+            reported_beat = self._beats
+            frame = sys._current_frames().get(self._loop_thread_ident)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<unavailable>"
+
+            self.metrics.inc("loop.slow_callbacks")
+            logger.warning(f"Event loop blocked for {blocked_for * 1000:.0f}ms, current stack:\n{stack}")
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+import aiofiles
+from loguru import logger
+
+
+class Histogram:
+    """Keeps the most recent observations for percentile queries plus lifetime count/sum"""
+
+    def __init__(self, max_samples: int = 4096):
+        self.samples: deque[float] = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentiles(self, quantiles: Iterable[float] = (0.5, 0.9, 0.99)) -> Dict[str, float]:
+        if not self.samples:
+            return {f"p{int(q * 100)}": 0.0 for q in quantiles}
+
+        ordered = sorted(self.samples)
+        last_index = len(ordered) - 1
+        return {f"p{int(q * 100)}": ordered[min(last_index, int(q * last_index + 0.5))] for q in quantiles}
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else 0.0,
+            "max": max(self.samples) if self.samples else 0.0,
+            **self.percentiles(),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.gauges: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = defaultdict(Histogram)
+        self.started_at = time.time()
+
+    def inc(self, name: str, value: float = 1) -> None:
+        self.counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        self.gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        self.histograms[name].observe(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "timestamp": time.time(),
+            "uptime": time.time() - self.started_at,
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            "histograms": {name: histogram.summary() for name, histogram in self.histograms.items()},
+        }
+
+    async def export(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        async with aiofiles.open(path, "w", encoding="utf-8") as file:
+            await file.write(json.dumps(self.snapshot(), indent=2, ensure_ascii=False))
+
+    async def export_periodically(self, path: Path, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.export(path)
+            except IOError as error:
+                logger.error(f"Failed to export metrics: {error}")
+
+
+metrics = MetricsRegistry()
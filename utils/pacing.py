@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import math
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Dict
+
+import pytz
+from loguru import logger
+
+from .clock import clock
+from .metrics import MetricsRegistry
+
+
+class Pacer:
+    """
+    Spreads periodic account work evenly over its interval.
+
+    Every account gets a stable phase offset inside the interval derived from a hash of its
+    email, and its next run is snapped to the grid ``offset + k * interval``. Accounts that
+    start together therefore drift apart after the first run and stay spread out, keeping
+    the aggregate request rate flat.
+    """
+
+    def __init__(self, metrics: MetricsRegistry, enabled: bool = True, min_gap_ratio: float = 0.5, report_interval: float = 300):
+        self.metrics = metrics
+        self.enabled = enabled
+        self.min_gap_ratio = min_gap_ratio
+        self.report_interval = report_interval
+        self.population = 0
+        self.intervals: Dict[str, float] = {}
+        self._events: Dict[str, deque[float]] = defaultdict(deque)
+
+    @staticmethod
+    def phase_offset(key: str, interval: float) -> float:
+        digest = hashlib.sha1(key.encode()).digest()
+        return int.from_bytes(digest[:8], "big") / 2 ** 64 * interval
+
+    def next_slot(self, key: str, kind: str, interval: float, now: datetime = None) -> datetime:
+        now = now or clock.now()
+        self.intervals[kind] = interval
+        if not self.enabled or interval <= 0:
+            return now + timedelta(seconds=interval)
+
+        offset = self.phase_offset(f"{kind}:{key}", interval)
+        earliest = now.timestamp() + interval * self.min_gap_ratio
+        slot = offset + math.ceil((earliest - offset) / interval) * interval
+        return datetime.fromtimestamp(slot, pytz.UTC)
+
+    def observe(self, kind: str) -> None:
+        now = clock.time()
+        events = self._events[kind]
+        events.append(now)
+        # Trim here as well, otherwise the window only shrinks when a report runs
+        while events[0] < now - self.report_interval:
+            events.popleft()
+
+    def set_population(self, accounts: int) -> None:
+        self.population = accounts
+
+    def _rates(self, kind: str, window: float) -> tuple[float, float, float]:
+        events = self._events[kind]
+        now = clock.time()
+        while events and events[0] < now - window:
+            events.popleft()
+
+        achieved = len(events) / window
+        interval = self.intervals.get(kind)
+        target = self.population / interval if interval else 0.0
+
+        # Peak-to-mean over 10 second buckets, 1.0 means perfectly flat
+        buckets = defaultdict(int)
+        for timestamp in events:
+            buckets[int((now - timestamp) // 10)] += 1
+        mean_per_bucket = len(events) / max(window / 10, 1)
+        peak_ratio = max(buckets.values()) / mean_per_bucket if buckets and mean_per_bucket else 0.0
+
+        return achieved, target, peak_ratio
+
+    def log_report(self) -> None:
+        for kind in list(self._events):
+            achieved, target, peak_ratio = self._rates(kind, self.report_interval)
+            self.metrics.set_gauge(f"pacing.{kind}.achieved_per_min", achieved * 60)
+            self.metrics.set_gauge(f"pacing.{kind}.target_per_min", target * 60)
+            self.metrics.set_gauge(f"pacing.{kind}.peak_to_mean", peak_ratio)
+            logger.info(
+                f"Pacing {kind}: {achieved * 60:.1f}/min achieved, {target * 60:.1f}/min target, "
+                f"peak-to-mean {peak_ratio:.2f}"
+            )
+
+    async def report_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.log_report()
@@ -0,0 +1,69 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .metrics import metrics, MetricsRegistry
+from .tracing import tracer
+
+
+class Pipeline:
+    """
+    Runs named async steps as a small dependency graph.
+
+    A step starts as soon as all of its dependencies have finished and is called with
+    their results as positional arguments. If any dependency returned ``None`` the step
+    is skipped and its own result is ``None``. Independent steps run concurrently.
+    A step that exceeds its timeout is cancelled and raises ``asyncio.TimeoutError``.
+    """
+
+    def __init__(self, name: str, registry: MetricsRegistry = metrics, timeouts: Optional[Dict[str, float]] = None):
+        self.name = name
+        self.metrics = registry
+        self.timeouts = timeouts or {}
+        self.steps: List[Tuple[str, Callable[..., Awaitable[Any]], Tuple[str, ...]]] = []
+        self.results: Dict[str, Any] = {}
+
+    def add(self, name: str, func: Callable[..., Awaitable[Any]], depends_on: Tuple[str, ...] = ()) -> "Pipeline":
+        known_steps = {step_name for step_name, _, _ in self.steps}
+        unknown = set(depends_on) - known_steps
+        if unknown:
+            raise ValueError(f"Step {name} depends on unknown steps: {', '.join(sorted(unknown))}")
+
+        self.steps.append((name, func, tuple(depends_on)))
+        return self
+
+    async def _run_step(self, name: str, func: Callable[..., Awaitable[Any]], dependencies: List[asyncio.Task]) -> Any:
+        arguments = [await dependency for dependency in dependencies]
+        if any(argument is None for argument in arguments):
+            return None
+
+        started = time.perf_counter()
+        try:
+            with tracer.span(f"{self.name}.{name}"):
+                return await asyncio.wait_for(func(*arguments), timeout=self.timeouts.get(name))
+        except asyncio.TimeoutError:
+            if name in self.timeouts:
+                self.metrics.inc(f"{self.name}.timeouts.{name}")
+                logger.warning(f"{self.name} step {name} exceeded its {self.timeouts[name]}s deadline")
+            raise
+        finally:
+            self.metrics.observe(f"{self.name}.step_ms.{name}", (time.perf_counter() - started) * 1000)
+
+    async def run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        for name, func, depends_on in self.steps:
+            tasks[name] = asyncio.ensure_future(self._run_step(name, func, [tasks[dependency] for dependency in depends_on]))
+
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        self.metrics.observe(f"{self.name}.total_ms", (time.perf_counter() - started) * 1000)
+
+        for name, outcome in zip(tasks, outcomes):
+            if isinstance(outcome, BaseException):
+                raise outcome
+            self.results[name] = outcome
+
+        return self.results
@@ -0,0 +1,232 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+class AsyncProfiler:
+    """
+    Sampling profiler for the event loop thread.
+
+    A background thread samples the loop thread's stack at a fixed interval. Each sample is
+    weighted by the wall and CPU time elapsed since the previous one and tagged with the
+    innermost ``Bot`` phase found on the stack. The thread stack only shows code that is
+    running: time spent waiting for curl_cffi or the database driver appears as the loop's
+    idle ``select``.
+
+    Waiting is attributed separately. On every sample the await chain of each suspended
+    task is walked (``cr_await`` from coroutine to coroutine), so ``await.folded`` tells how
+    long tasks spent suspended in which call, e.g. in ``AsyncSession.request`` versus a
+    Tortoise query. Tasks wait concurrently, so these totals are task-seconds and can
+    exceed the wall time.
+    """
+
+    PHASES = ("_prepare_account", "_process_node", "_process_heartbeat")
+    IDLE_FUNCTIONS = frozenset({"select", "poll", "epoll", "kqueue", "control"})
+
+    def __init__(self, output_dir: str = "./results/profile", interval: float = 0.005, phases: Tuple[str, ...] = PHASES):
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.phases = frozenset(phases)
+
+        self.wall_samples: Dict[Tuple[str, ...], float] = defaultdict(float)
+        self.cpu_samples: Dict[Tuple[str, ...], float] = defaultdict(float)
+        self.await_samples: Dict[Tuple[str, ...], float] = defaultdict(float)
+
+        self._target_ident: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._cpu_clock: Optional[int] = None
+        self.started_at: Optional[float] = None
+        self.duration = 0.0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._target_ident = threading.get_ident()
+        self._loop = asyncio.get_running_loop()
+        self._cpu_clock = self._get_cpu_clock(self._target_ident)
+        self._stop_event.clear()
+        self.started_at = time.perf_counter()
+
+        self._thread = threading.Thread(target=self._sample_loop, name="async-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self.duration = time.perf_counter() - self.started_at
+
+    @staticmethod
+    def _get_cpu_clock(thread_ident: int) -> Optional[int]:
+        try:
+            return time.pthread_getcpuclockid(thread_ident)
+        except (AttributeError, OSError):
+            return None
+
+    def _cpu_time(self) -> float:
+        if self._cpu_clock is not None:
+            return time.clock_gettime(self._cpu_clock)
+        # Process-wide fallback (Windows / macOS): includes the sampler thread itself
+        return time.process_time()
+
+    def _sample_loop(self) -> None:
+        last_wall = time.perf_counter()
+        last_cpu = self._cpu_time()
+
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self._target_ident)
+            now_wall = time.perf_counter()
+            now_cpu = self._cpu_time()
+
+            if frame is not None:
+                stack = self._collapse(frame)
+                self.wall_samples[stack] += now_wall - last_wall
+                self.cpu_samples[stack] += max(now_cpu - last_cpu, 0.0)
+
+            for stack in self._suspended_stacks():
+                self.await_samples[stack] += now_wall - last_wall
+
+            last_wall, last_cpu = now_wall, now_cpu
+
+    def _suspended_stacks(self) -> List[Tuple[str, ...]]:
+        try:
+            # Read from another thread; all_tasks retries when the task set changes meanwhile
+            tasks = asyncio.all_tasks(self._loop)
+        except RuntimeError:
+            return []
+
+        stacks = []
+        for task in tasks:
+            coro = task.get_coro()
+            if getattr(coro, "cr_running", False):
+                # The running task's time is already on the thread stack
+                continue
+
+            frames = []
+            awaitable = coro
+            while awaitable is not None:
+                frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+                if frame is None:
+                    break
+                frames.append(frame)
+                awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+
+            if frames:
+                stacks.append(self._collapse_chain(frames))
+
+        return stacks
+
+    def _collapse_chain(self, frames: List[FrameType]) -> Tuple[str, ...]:
+        """Like ``_collapse``, for a suspended await chain listed outermost first"""
+        names = [self._frame_name(frame) for frame in frames]
+        phase = next((frame.f_code.co_name for frame in reversed(frames) if frame.f_code.co_name in self.phases), "other")
+        return (f"phase:{phase}", *names)
+
+    @staticmethod
+    def _frame_name(frame: FrameType) -> str:
+        code = frame.f_code
+        return f"{getattr(code, 'co_qualname', code.co_name)} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+    def _collapse(self, frame: FrameType) -> Tuple[str, ...]:
+        names: List[str] = []
+        phase = None
+        current = frame
+
+        while current is not None:
+            code = current.f_code
+            if phase is None and code.co_name in self.phases:
+                phase = code.co_name
+
+            names.append(self._frame_name(current))
+            current = current.f_back
+
+        names.reverse()
+        if phase is None:
+            phase = "idle" if frame.f_code.co_name in self.IDLE_FUNCTIONS else "other"
+
+        return (f"phase:{phase}", *names)
+
+    @staticmethod
+    def _write_folded(path: Path, samples: Dict[Tuple[str, ...], float]) -> None:
+        # Brendan Gregg's collapsed format, weights in microseconds
+        with path.open("w", encoding="utf-8") as file:
+            for stack, seconds in sorted(samples.items()):
+                weight = int(seconds * 1_000_000)
+                if weight > 0:
+                    file.write(f"{';'.join(stack)} {weight}\n")
+
+    def _summarize(self) -> str:
+        self_time: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0])
+        total_time: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0])
+        phase_time: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0])
+
+        for stack, wall in self.wall_samples.items():
+            cpu = self.cpu_samples.get(stack, 0.0)
+            phase, frames = stack[0], stack[1:]
+
+            phase_time[phase][0] += wall
+            phase_time[phase][1] += cpu
+
+            if frames:
+                self_time[frames[-1]][0] += wall
+                self_time[frames[-1]][1] += cpu
+
+            for name in set(frames):
+                total_time[name][0] += wall
+                total_time[name][1] += cpu
+
+        lines = [
+            f"Profiled {self.duration:.2f}s of wall time, sampling every {self.interval * 1000:.1f}ms",
+            "",
+            f"{'Phase':<40} {'Wall (s)':>10} {'CPU (s)':>10}",
+        ]
+        for phase, (wall, cpu) in sorted(phase_time.items(), key=lambda item: -item[1][0]):
+            lines.append(f"{phase:<40} {wall:>10.3f} {cpu:>10.3f}")
+
+        lines += ["", f"{'Function':<90} {'Self wall':>10} {'Self CPU':>10} {'Total wall':>11} {'Total CPU':>10}"]
+        for name, (wall, cpu) in sorted(self_time.items(), key=lambda item: -item[1][1])[:50]:
+            total_wall, total_cpu = total_time[name]
+            lines.append(f"{name[:90]:<90} {wall:>10.3f} {cpu:>10.3f} {total_wall:>11.3f} {total_cpu:>10.3f}")
+
+        await_time: Dict[str, float] = defaultdict(float)
+        await_phase_time: Dict[str, float] = defaultdict(float)
+        for stack, seconds in self.await_samples.items():
+            await_phase_time[stack[0]] += seconds
+            for name in set(stack[1:]):
+                await_time[name] += seconds
+
+        lines += ["", f"{'Phase (suspended tasks)':<40} {'Await (task-s)':>15}"]
+        for phase, seconds in sorted(await_phase_time.items(), key=lambda item: -item[1]):
+            lines.append(f"{phase:<40} {seconds:>15.3f}")
+
+        lines += ["", f"{'Awaited in function':<90} {'Await (task-s)':>15}"]
+        for name, seconds in sorted(await_time.items(), key=lambda item: -item[1])[:50]:
+            lines.append(f"{name[:90]:<90} {seconds:>15.3f}")
+
+        return "\n".join(lines) + "\n"
+
+    def export(self) -> Path:
+        run_dir = self.output_dir / datetime.now().strftime("%Y%m%d_%H%M%S")
+        run_dir.mkdir(parents=True, exist_ok=True)
+
+        self._write_folded(run_dir / "wall.folded", self.wall_samples)
+        self._write_folded(run_dir / "cpu.folded", self.cpu_samples)
+        self._write_folded(run_dir / "await.folded", self.await_samples)
+        (run_dir / "summary.txt").write_text(self._summarize(), encoding="utf-8")
+
+        logger.info(f"Profile saved to {run_dir}")
+        return run_dir
@@ -0,0 +1,182 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from better_proxy import Proxy
+from loguru import logger
+
+from .clock import clock
+from .metrics import MetricsRegistry
+
+
+class ProxyStats:
+    def __init__(self, proxy: Optional[Proxy], window: int):
+        self.proxy = proxy
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.consecutive_failures = 0
+        self.connect_ms: Optional[float] = None
+        self.last_check: Optional[float] = None
+
+    @property
+    def success_rate(self) -> float:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 1.0
+
+    def observe_connect(self, connect_ms: float) -> None:
+        # Exponentially weighted, recent checks matter more
+        self.connect_ms = connect_ms if self.connect_ms is None else self.connect_ms * 0.8 + connect_ms * 0.2
+
+
+class ProxyHealthTracker:
+    """
+    Tracks request outcomes and connect latency per proxy.
+
+    A proxy becomes unhealthy after ``failure_threshold`` consecutive failures or when its
+    success rate over the last ``window`` requests drops below ``min_success_rate``.
+    Unhealthy proxies are re-checked in the background with a plain TCP connect and
+    recover as soon as the check succeeds.
+    """
+
+    def __init__(
+            self,
+            metrics: MetricsRegistry,
+            enabled: bool = True,
+            failure_threshold: int = 5,
+            min_success_rate: float = 0.3,
+            window: int = 20,
+            check_interval: float = 60,
+            check_timeout: float = 5,
+            report_interval: float = 300,
+    ):
+        self.metrics = metrics
+        self.enabled = enabled
+        self.failure_threshold = failure_threshold
+        self.min_success_rate = min_success_rate
+        self.window = window
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.report_interval = report_interval
+        self.stats: Dict[str, ProxyStats] = {}
+
+    @staticmethod
+    def key(proxy: Optional[Proxy]) -> str:
+        return proxy.as_url if proxy else "direct"
+
+    def _get_stats(self, proxy: Optional[Proxy]) -> ProxyStats:
+        key = self.key(proxy)
+        if key not in self.stats:
+            self.stats[key] = ProxyStats(proxy, self.window)
+        return self.stats[key]
+
+    def record(self, proxy: Optional[Proxy], success: bool, timeout: bool = False) -> None:
+        stats = self._get_stats(proxy)
+        stats.outcomes.append(success)
+
+        if success:
+            stats.successes += 1
+            stats.consecutive_failures = 0
+        else:
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if timeout:
+                stats.timeouts += 1
+
+    def observe_connect(self, proxy: Optional[Proxy], connect_ms: float) -> None:
+        self._get_stats(proxy).observe_connect(connect_ms)
+
+    def _is_healthy(self, stats: ProxyStats) -> bool:
+        if stats.consecutive_failures >= self.failure_threshold:
+            return False
+
+        return len(stats.outcomes) < self.window // 2 or stats.success_rate >= self.min_success_rate
+
+    def is_healthy(self, proxy: Optional[Proxy]) -> bool:
+        if not self.enabled or proxy is None:
+            return True
+
+        stats = self.stats.get(self.key(proxy))
+        return stats is None or self._is_healthy(stats)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            key: {
+                "outcomes": "".join("1" if outcome else "0" for outcome in stats.outcomes),
+                "successes": stats.successes,
+                "failures": stats.failures,
+                "timeouts": stats.timeouts,
+                "consecutive_failures": stats.consecutive_failures,
+                "connect_ms": stats.connect_ms,
+                "last_check": stats.last_check,
+            }
+            for key, stats in self.stats.items()
+        }
+
+    def restore(self, state: Dict[str, Dict[str, Any]]) -> None:
+        for key, values in state.items():
+            stats = self._get_stats(None if key == "direct" else Proxy.from_str(key))
+            stats.outcomes.extend(outcome == "1" for outcome in values["outcomes"])
+            stats.successes = values["successes"]
+            stats.failures = values["failures"]
+            stats.timeouts = values["timeouts"]
+            stats.consecutive_failures = values["consecutive_failures"]
+            stats.connect_ms = values["connect_ms"]
+            stats.last_check = values["last_check"]
+
+    async def check(self, stats: ProxyStats) -> bool:
+        started = time.perf_counter()
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(stats.proxy.host, stats.proxy.port), timeout=self.check_timeout
+            )
+            writer.close()
+        except (asyncio.TimeoutError, OSError):
+            stats.last_check = clock.time()
+            return False
+
+        stats.last_check = clock.time()
+        stats.observe_connect((time.perf_counter() - started) * 1000)
+        return True
+
+    async def run_checks(self) -> None:
+        while self.enabled:
+            await asyncio.sleep(self.check_interval)
+
+            suspects = [stats for stats in self.stats.values() if stats.proxy and not self._is_healthy(stats)]
+            results = await asyncio.gather(*(self.check(stats) for stats in suspects))
+
+            for stats, recovered in zip(suspects, results):
+                if recovered:
+                    stats.consecutive_failures = 0
+                    stats.outcomes.clear()
+                    logger.info(f"Proxy {stats.proxy.host}:{stats.proxy.port} is reachable again")
+
+            self._publish()
+
+    def _publish(self) -> None:
+        unhealthy = sum(1 for stats in self.stats.values() if stats.proxy and not self._is_healthy(stats))
+        self.metrics.set_gauge("proxy.tracked", len(self.stats))
+        self.metrics.set_gauge("proxy.unhealthy", unhealthy)
+
+    def log_report(self) -> None:
+        self._publish()
+        unhealthy = [stats for stats in self.stats.values() if stats.proxy and not self._is_healthy(stats)]
+        if not self.stats:
+            return
+
+        lines = [f"Proxy health: {len(self.stats) - len(unhealthy)}/{len(self.stats)} healthy"]
+        for stats in sorted(unhealthy, key=lambda item: item.success_rate):
+            connect = f"{stats.connect_ms:.0f}ms" if stats.connect_ms is not None else "n/a"
+            lines.append(
+                f"  {stats.proxy.host}:{stats.proxy.port} | success {stats.success_rate:.0%} | "
+                f"timeouts {stats.timeouts} | consecutive failures {stats.consecutive_failures} | connect {connect}"
+            )
+
+        logger.info("\n".join(lines))
+
+    async def report_periodically(self) -> None:
+        while self.enabled:
+            await asyncio.sleep(self.report_interval)
+            self.log_report()
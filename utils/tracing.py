@@ -0,0 +1,209 @@
+import asyncio
+import contextvars
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import aiofiles
+from loguru import logger
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "start_ns", "end_ns", "attributes", "error", "trace")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Dict[str, Any] = None):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.parent_span_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes) if attributes else {}
+        self.error: Optional[str] = None
+        # Finished spans of the whole trace, shared with the root
+        self.trace: List[Span] = parent.trace if parent else []
+
+    @property
+    def duration(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException) -> None:
+        message = str(error)
+        self.error = (f"{type(error).__name__}: {message}" if message else type(error).__name__)[:500]
+
+    @staticmethod
+    def _encode_value(value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": self._encode_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, error: BaseException) -> None:
+        pass
+
+
+class JsonlSpanExporter:
+    """
+    Buffers finished traces and appends them to a JSONL file, one OTLP ``ExportTraceServiceRequest``
+    per line (the format of the OpenTelemetry collector's file exporter). The file is rotated
+    to ``.1 ... .N`` once it exceeds ``max_bytes``.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 50 * 1024 * 1024, backup_count: int = 5, service_name: str = "pipe-network-bot"):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.service_name = service_name
+        self._buffer: List[str] = []
+
+    def export(self, spans: List[Span]) -> None:
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{"scope": {"name": "pipe-network-bot"}, "spans": [span.to_otlp() for span in spans]}],
+            }]
+        }
+        self._buffer.append(json.dumps(request, ensure_ascii=False, separators=(",", ":")))
+
+    def _rotate(self) -> None:
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{index}")
+            if source.exists():
+                source.replace(self.path.with_name(f"{self.path.name}.{index + 1}"))
+
+        if self.backup_count > 0:
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+
+        lines, self._buffer = self._buffer, []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size >= self.max_bytes:
+            self._rotate()
+
+        async with aiofiles.open(self.path, "a", encoding="utf-8") as file:
+            await file.write("\n".join(lines) + "\n")
+
+
+class Tracer:
+    """
+    Minimal tracer for pass/phase/request timing.
+
+    Spans nest through a context variable, so tasks created inside a span (pipeline steps,
+    ``wait_for``) become its children. Sampling is decided when the root span ends: a trace
+    is kept with probability ``sample_rate``, and always when it failed or took longer than
+    ``slow_threshold`` seconds, so slow paths are never sampled away.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 0.01
+        self.slow_threshold = 30.0
+        self.flush_interval = 5.0
+        self.exporter: Optional[JsonlSpanExporter] = None
+        self._current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+        self._noop = _NoopSpan()
+
+    def configure(
+            self,
+            enabled: bool,
+            sample_rate: float,
+            slow_threshold: float,
+            exporter: JsonlSpanExporter,
+            flush_interval: float = 5.0,
+    ) -> None:
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.exporter = exporter
+        self.flush_interval = flush_interval
+
+    @property
+    def current_span(self) -> Optional[Span]:
+        return self._current.get()
+
+    def detach(self) -> None:
+        """Clears the current span, spans opened afterwards in this context start their own trace"""
+        self._current.set(None)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        if not self.enabled or self.exporter is None:
+            yield self._noop
+            return
+
+        parent = self._current.get()
+        span = Span(name, parent, attributes)
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as error:
+            span.set_error(error)
+            raise
+        finally:
+            self._current.reset(token)
+            span.end_ns = time.time_ns()
+            span.trace.append(span)
+            if parent is None:
+                self._finish_trace(span)
+
+    def traced(self, name: str):
+        """Decorator, runs the coroutine function inside a span"""
+        def decorator(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _finish_trace(self, root: Span) -> None:
+        failed = any(span.error for span in root.trace)
+        if failed or root.duration >= self.slow_threshold or random.random() < self.sample_rate:
+            self.exporter.export(root.trace)
+
+    async def export_periodically(self) -> None:
+        while self.enabled and self.exporter is not None:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.exporter.flush()
+            except OSError as error:
+                logger.error(f"Failed to write traces: {error}")
+
+
+tracer = Tracer()